@@ -1,65 +1,106 @@
+import os
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
+from comparison_chart import build_comparison_figure, page_of, select_players
+from player_index import PlayerIndex
+from player_search import PAGE_SIZE, PlayerSearch
+from rating_trends import CHANGE_WINDOWS, MOVERS_PATH, load_movers
+from ratings_cache import RatingsCache
+from ratings_repo import has_repo
+from ratings_schema import isin
+from ratings_store import filter_ratings, load_latest_snapshot, load_profiles
 
 st.set_page_config(page_title="World Tennis Number - PNW", layout="wide")
 
 st.title("World Tennis Number - Pacific Northwest Players")
 
-@st.cache_data
-def load_data():
-    ratings = pd.read_csv('data/wtn_ratings.csv', encoding='utf-8-sig')
-    profiles = pd.read_csv('data/wtn_profile_links.csv', encoding='utf-8-sig')
+@st.cache_resource
+def get_ratings_cache():
+    # One in-memory copy of the ratings per process, refreshed incrementally; its
+    # memory footprint is logged after each full load (not on incremental refreshes)
+    return RatingsCache(report_memory=True)
 
-    ratings['Date'] = pd.to_datetime(ratings['Date'], format='mixed')
-    ratings['Rating'] = pd.to_numeric(ratings['Rating'], errors='coerce')
+ratings_cache = get_ratings_cache()
+ratings_cache.refresh()
+version = ratings_cache.version
 
-    # Exclude Low confidence ratings
-    ratings = ratings[ratings['Confidence'] != 'Low']
+# Everything derived from the ratings is keyed on `version`, which only changes
+# when the ratings do.
 
-    return ratings, profiles
+@st.cache_data(max_entries=32)
+def load_data(version, columns=None, formats=None, dates=None):
+    # Only the columns, formats and dates the caller needs, filtered from the in-memory
+    # frame rather than re-read from Parquet. Low confidence ratings are excluded.
+    return filter_ratings(ratings_cache.frame, columns=columns, formats=formats, dates=dates)
 
-ratings_df, profiles_df = load_data()
+@st.cache_data
+def load_profile_data():
+    return load_profiles()
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Player Ratings", "Statistics", "Player Profiles", "Doubles Comparison", "Singles Comparison"])
+@st.cache_data(max_entries=4)
+def load_snapshot(version, formats=None):
+    # One row per (UAID, Format): latest rating, confidence, date and previous value
+    if has_repo():
+        return load_latest_snapshot(formats)
+    snapshot = ratings_cache.snapshot()
+    return snapshot if formats is None else snapshot[isin(snapshot['Format'], formats)]
 
-with tab1:
-    st.header("Player Rating Trends")
+@st.cache_resource(max_entries=2)
+def get_player_index(version):
+    # Built once per data version; shared by all sessions
+    return PlayerIndex(ratings_cache.frame)
+
+@st.cache_data(max_entries=2)
+def load_movers_data(mtime):
+    # Precomputed after each scrape by rating_trends.py; keyed on the file's mtime
+    return load_movers()
 
-    players = sorted(ratings_df['Name'].unique())
-    selected_player = st.selectbox("Select a player:", players)
+@st.cache_resource(max_entries=2)
+def get_player_search(version):
+    # Folded-name token index over the players, built once per data version
+    return PlayerSearch(get_player_index(version).players, ratings_cache.frame, load_profile_data())
 
-    player_data = ratings_df[ratings_df['Name'] == selected_player]
+profiles_df = load_profile_data()
+latest = ratings_cache.frame['Date'].max()
 
-    # Calculate shared y-axis range for both charts
-    singles_data = player_data[player_data['Format'] == 'Singles'].sort_values('Date')
-    doubles_data = player_data[player_data['Format'] == 'Doubles'].sort_values('Date')
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Player Ratings", "Statistics", "Player Profiles", "Doubles Comparison", "Singles Comparison", "Movers"])
 
-    # Find min and max across both formats
-    all_ratings = []
-    if not singles_data.empty:
-        all_ratings.extend(singles_data['Rating'].tolist())
-    if not doubles_data.empty:
-        all_ratings.extend(doubles_data['Rating'].tolist())
+with tab1:
+    st.header("Player Rating Trends")
 
-    if all_ratings:
-        y_min = min(all_ratings)
-        y_max = max(all_ratings)
+    index = get_player_index(version)
+    search = get_player_search(version)
 
-        # Ensure at least 2.0 range
-        range_size = y_max - y_min
-        if range_size < 2.0:
-            padding = (2.0 - range_size) / 2
-            y_min = y_min - padding
-            y_max = y_max + padding
-        else:
-            # Add small padding for visual comfort
-            padding = range_size * 0.05
-            y_min = y_min - padding
-            y_max = y_max + padding
-    else:
-        y_min, y_max = None, None
+    # Search, then pick from one page of matches; the picker is keyed by UAID
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        query = st.text_input("Search players:", placeholder="Name or UAID, e.g. 'ann sm'", key="player_query")
+    with col2:
+        query_levels = st.multiselect("NTRP level:", search.levels, key="player_levels")
+    with col3:
+        query_format = st.selectbox("Rated in:", ["Any format", "Singles", "Doubles"], key="player_format")
+    query_format = None if query_format == "Any format" else query_format
+
+    # The page picker sits under the results, so read its value from the previous run
+    result_page = st.session_state.get("player_page", 1) - 1
+    results, total = search.search(query, query_levels, query_format, page=result_page)
+    pages = max(1, (total - 1) // PAGE_SIZE + 1)
+    if result_page >= pages:
+        # The filters changed and left fewer pages
+        st.session_state.pop("player_page", None)
+        result_page = 0
+        results, total = search.search(query, query_levels, query_format, page=result_page)
+    labels = dict(zip(results['UAID'], results['Label']))
+    selected_uaid = st.selectbox(f"Select a player ({total} found):", list(labels), format_func=labels.get)
+    if pages > 1:
+        st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1, key="player_page")
+    selected_player = index.name(selected_uaid) if selected_uaid in index else None
+
+    # Pre-sorted series and shared y-axis range from the index: an O(1) lookup
+    singles_data = index.series(selected_uaid, 'Singles')
+    doubles_data = index.series(selected_uaid, 'Doubles')
+    y_min, y_max = index.y_range(selected_uaid) if selected_uaid in index else (None, None)
 
     col1, col2 = st.columns(2)
 
@@ -67,7 +108,7 @@ with tab1:
         st.subheader("Singles")
         if not singles_data.empty:
             # Select only the columns needed for plotting to avoid multiple series
-            plot_data = singles_data[['Date', 'Rating']].copy()
+            plot_data = singles_data[['Date', 'Rating']]
             fig = px.line(plot_data, x='Date', y='Rating',
                          title=f'{selected_player} - Singles Rating',
                          markers=True)
@@ -87,7 +128,7 @@ with tab1:
         st.subheader("Doubles")
         if not doubles_data.empty:
             # Select only the columns needed for plotting to avoid multiple series
-            plot_data = doubles_data[['Date', 'Rating']].copy()
+            plot_data = doubles_data[['Date', 'Rating']]
             fig = px.line(plot_data, x='Date', y='Rating',
                          title=f'{selected_player} - Doubles Rating',
                          markers=True)
@@ -108,17 +149,12 @@ with tab2:
 
     format_choice = st.radio("Select format:", ['Singles', 'Doubles', 'Both'])
 
-    if format_choice == 'Both':
-        filtered_data = ratings_df
-    else:
-        filtered_data = ratings_df[ratings_df['Format'] == format_choice]
-
-    latest_date = filtered_data['Date'].max()
-    latest_ratings = filtered_data[filtered_data['Date'] == latest_date]
+    formats = None if format_choice == 'Both' else (format_choice,)
+    latest_ratings = load_snapshot(version, formats)
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Players", len(latest_ratings['Name'].unique()))
+        st.metric("Total Players", latest_ratings['UAID'].nunique())
     with col2:
         st.metric("Average Rating", f"{latest_ratings['Rating'].mean():.2f}")
     with col3:
@@ -139,8 +175,8 @@ with tab3:
     st.header("Player Profiles")
 
     merged_data = profiles_df.merge(
-        ratings_df[ratings_df['Date'] == ratings_df['Date'].max()],
-        on=['Name', 'UAID'],
+        load_snapshot(version)[['UAID', 'Rating', 'Format', 'Confidence']],
+        on='UAID',
         how='left'
     ).sort_values('Name')
 
@@ -153,108 +189,81 @@ with tab3:
         }
     )
 
-with tab4:
-    st.header("Doubles Comparison")
+def render_comparison(format_name):
+    data = load_data(version, columns=('UAID', 'Name', 'Date', 'Rating'), formats=(format_name,))
+    key = format_name.lower()
 
-    # Filter for doubles data with at least 2 data points per player
-    doubles_df = ratings_df[ratings_df['Format'] == 'Doubles'].copy()
-
-    # Count data points per player
-    player_counts = doubles_df.groupby('Name').size()
-    players_with_multiple = player_counts[player_counts >= 2].index
-
-    # Filter to only players with 2+ data points
-    comparison_data = doubles_df[doubles_df['Name'].isin(players_with_multiple)].sort_values('Date')
-
-    if not comparison_data.empty:
-        fig = px.line(comparison_data, x='Date', y='Rating', color='Name',
-                     title='Doubles Rating Comparison Over Time',
-                     markers=True)
-        fig.update_layout(
-            height=2000,
-            yaxis_title="WTN Doubles Rating",
-            xaxis_title="Date",
-            hovermode='x unified',
-            showlegend=True,
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=1.01
-            )
-        )
-
-        # Add text labels at the end of each line
-        for player in players_with_multiple:
-            player_data = comparison_data[comparison_data['Name'] == player]
-            if not player_data.empty:
-                last_point = player_data.iloc[-1]
-                fig.add_annotation(
-                    x=last_point['Date'],
-                    y=last_point['Rating'],
-                    text=player,
-                    showarrow=False,
-                    xanchor='left',
-                    xshift=10,
-                    font=dict(size=10)
-                )
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        levels = sorted(profiles_df['NTRP_2026'].dropna().unique())
+        cohort = st.multiselect("NTRP level:", levels, key=f"{key}_cohort")
+    with col2:
+        page_size = st.selectbox("Players per page:", [10, 25, 50, 100], index=1, key=f"{key}_page_size")
+
+    # Players with 2+ data points, best latest rating first
+    players = select_players(data, min_points=2, cohort=cohort, profiles=profiles_df)
 
+    if not players.empty:
+        pages = (len(players) - 1) // page_size + 1
+        page = st.number_input("Page:", min_value=1, max_value=pages, value=1, key=f"{key}_page") - 1
+        shown = page_of(players, page, page_size)
+
+        fig = build_comparison_figure(data, shown, format_name)
         st.plotly_chart(fig, use_container_width=True)
-        st.info(f"Showing {len(players_with_multiple)} players with 2 or more doubles ratings")
+        st.info(f"Showing {len(shown)} of {len(players)} players with 2 or more {key} ratings "
+                f"(page {page + 1} of {pages})")
     else:
-        st.info("No players with multiple doubles ratings available")
+        st.info(f"No players with multiple {key} ratings available")
+
+with tab4:
+    st.header("Doubles Comparison")
+    render_comparison('Doubles')
 
 with tab5:
     st.header("Singles Comparison")
+    render_comparison('Singles')
 
-    # Filter for singles data with at least 2 data points per player
-    singles_df = ratings_df[ratings_df['Format'] == 'Singles'].copy()
-
-    # Count data points per player
-    player_counts = singles_df.groupby('Name').size()
-    players_with_multiple = player_counts[player_counts >= 2].index
-
-    # Filter to only players with 2+ data points
-    comparison_data = singles_df[singles_df['Name'].isin(players_with_multiple)].sort_values('Date')
-
-    if not comparison_data.empty:
-        fig = px.line(comparison_data, x='Date', y='Rating', color='Name',
-                     title='Singles Rating Comparison Over Time',
-                     markers=True)
-        fig.update_layout(
-            height=2000,
-            yaxis_title="WTN Singles Rating",
-            xaxis_title="Date",
-            hovermode='x unified',
-            showlegend=True,
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=1.01
-            )
-        )
-
-        # Add text labels at the end of each line
-        for player in players_with_multiple:
-            player_data = comparison_data[comparison_data['Name'] == player]
-            if not player_data.empty:
-                last_point = player_data.iloc[-1]
-                fig.add_annotation(
-                    x=last_point['Date'],
-                    y=last_point['Rating'],
-                    text=player,
-                    showarrow=False,
-                    xanchor='left',
-                    xshift=10,
-                    font=dict(size=10)
-                )
+with tab6:
+    st.header("Movers")
 
-        st.plotly_chart(fig, use_container_width=True)
-        st.info(f"Showing {len(players_with_multiple)} players with 2 or more singles ratings")
+    movers = load_movers_data(os.path.getmtime(MOVERS_PATH)) if os.path.exists(MOVERS_PATH) else None
+    if movers is None or movers.empty:
+        st.info("No trend data yet. It is built after each scrape, or run `python rating_trends.py`.")
     else:
-        st.info("No players with multiple singles ratings available")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            movers_format = st.radio("Format:", ['Doubles', 'Singles'], key="movers_format", horizontal=True)
+        with col2:
+            windows = {f"Last {days} days": column for column, days in CHANGE_WINDOWS.items()}
+            change = windows[st.selectbox("Period:", list(windows), key="movers_period")]
+        with col3:
+            levels = sorted(movers['NTRP_2026'].dropna().unique())
+            movers_cohort = st.multiselect("NTRP level:", levels, key="movers_cohort")
+
+        shown = movers[isin(movers['Format'], [movers_format]) & movers[change].notna()]
+        if movers_cohort:
+            shown = shown[shown['NTRP_2026'].isin(movers_cohort)]
+
+        # WTN counts down, so improving means the rating went down
+        columns = ['Name', 'NTRP_2026', 'Rating', change, 'Slope_30d', 'Percentile', 'Points']
+        column_config = {
+            'Rating': st.column_config.NumberColumn(format="%.2f"),
+            change: st.column_config.NumberColumn("Change", format="%+.2f"),
+            'Slope_30d': st.column_config.NumberColumn("Trend / 30 days", format="%+.2f"),
+            'Percentile': st.column_config.NumberColumn("Cohort percentile", format="%.0f"),
+        }
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Most Improved")
+            st.dataframe(shown[shown[change] < 0].nsmallest(10, change)[columns], hide_index=True,
+                         use_container_width=True, column_config=column_config)
+        with col2:
+            st.subheader("Biggest Drops")
+            st.dataframe(shown[shown[change] > 0].nlargest(10, change)[columns], hide_index=True,
+                         use_container_width=True, column_config=column_config)
+        st.caption(f"Latest ratings as of {movers['Date'].max().strftime('%Y-%m-%d')}. Percentile is within the "
+                   "player's NTRP level on that date; 100 is the best rating in the level.")
 
 st.sidebar.markdown("---")
-st.sidebar.info(f"Last updated: {ratings_df['Date'].max().strftime('%Y-%m-%d')}")
-st.sidebar.info(f"Total players tracked: {len(ratings_df['Name'].unique())}")
+st.sidebar.info(f"Last updated: {latest.strftime('%Y-%m-%d')}")
+st.sidebar.info(f"Total players tracked: {ratings_cache.frame['Name'].nunique()}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard computations and the cleaner on synthetic data.
+Each stage of app.py runs here without the Streamlit UI: loading, incremental
+reload, the player index, the latest snapshot, the Statistics/Profiles/Comparison
+tab computations, and the duplicate cleaner. Every stage is timed (median of
+--repeat runs) and memory-profiled (tracemalloc peak), and results can be saved
+to a JSON baseline so regressions show up from run to run.
+
+Usage:
+    python benchmarks/bench_dashboard.py --players 10000 --years 5
+    python benchmarks/bench_dashboard.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/bench_dashboard.py                      # compare against it
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from synth_data import generate, write
+from clean_duplicates import analyze
+from comparison_chart import build_comparison_figure, page_of, select_players
+from player_index import PlayerIndex
+from ratings_cache import RatingsCache
+from ratings_schema import memory_report
+from ratings_store import build_snapshot, filter_ratings
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure(fn, repeat):
+    """Median wall time over repeat runs, plus the tracemalloc peak of one more run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': statistics.median(times), 'peak_mb': peak / 2**20}
+
+
+def run_stages(data_dir, repeat):
+    """Run every stage against the CSVs in data_dir and return {stage: measurement}."""
+    csv_path = os.path.join(data_dir, "wtn_ratings.csv")
+    profiles = pd.read_csv(os.path.join(data_dir, "wtn_profile_links.csv"), encoding='utf-8-sig')
+    missing = os.path.join(data_dir, "missing")
+    raw = pd.read_csv(csv_path)
+    results = {}
+
+    def new_cache():
+        return RatingsCache(csv_path=csv_path, parquet_dir=missing, db_path=missing)
+
+    # Reference: what load_data did before the store/cache work
+    def legacy_load():
+        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        df['Date'] = pd.to_datetime(df['Date'], format='mixed')
+        df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
+        return df[df['Confidence'] != 'Low']
+    results['legacy_load'] = measure(legacy_load, repeat)
+
+    results['cache_full_load'] = measure(lambda: new_cache().refresh(), repeat)
+
+    # Incremental reload after one more week of ratings is appended
+    last = raw[raw['Date'] == raw['Date'].iloc[-1]]
+    week = last.assign(Date=(pd.to_datetime(last['Date'], format='mixed') + pd.Timedelta(days=7)).dt.strftime("%m/%d/%Y"))
+    work_csv = csv_path + ".work"
+
+    def incremental():
+        shutil.copyfile(csv_path, work_csv)
+        cache = RatingsCache(csv_path=work_csv, parquet_dir=missing, db_path=missing)
+        cache.refresh()
+        with open(work_csv, 'a', encoding='utf-8', newline='') as f:
+            week.to_csv(f, header=False, index=False)
+        start = time.perf_counter()
+        cache.refresh()
+        return time.perf_counter() - start
+    times = [incremental() for _ in range(repeat)]
+    results['cache_incremental_reload'] = {'seconds': statistics.median(times), 'peak_mb': None}
+    os.remove(work_csv)
+
+    cache = new_cache()
+    cache.refresh()
+    frame = cache.frame
+    memory_report(frame, "Ratings cache (csv)")
+
+    results['player_index_build'] = measure(lambda: PlayerIndex(frame), repeat)
+    index = PlayerIndex(frame)
+    uaids = index.players['UAID'].to_numpy()
+    picks = np.random.default_rng(0).choice(uaids, size=min(1000, len(uaids)))
+
+    def lookups():
+        for uaid in picks:
+            index.series(uaid, 'Singles')
+            index.series(uaid, 'Doubles')
+            index.y_range(uaid)
+    results['player_lookup_x1000'] = measure(lookups, repeat)
+
+    results['snapshot_build'] = measure(lambda: build_snapshot(frame), repeat)
+    snapshot = build_snapshot(frame)
+
+    def statistics_tab():
+        for formats in (['Singles'], ['Doubles'], None):
+            latest = snapshot if formats is None else snapshot[snapshot['Format'].isin(formats)]
+            latest['UAID'].nunique(), latest['Rating'].mean(), latest['Rating'].min(), latest['Rating'].max()
+            np.histogram(latest['Rating'].dropna(), bins=20)
+            latest.nsmallest(10, 'Rating')
+    results['statistics_tab'] = measure(statistics_tab, repeat)
+
+    results['profiles_tab'] = measure(
+        lambda: profiles.merge(snapshot[['UAID', 'Rating', 'Format', 'Confidence']], on='UAID', how='left').sort_values('Name'),
+        repeat)
+
+    doubles = filter_ratings(frame, columns=['UAID', 'Name', 'Date', 'Rating'], formats=['Doubles'])
+
+    def comparison_tab():
+        players = select_players(doubles, min_points=2, profiles=profiles)
+        return build_comparison_figure(doubles, page_of(players, 0, 25), 'Doubles')
+    results['comparison_tab'] = measure(comparison_tab, repeat)
+    results['comparison_tab']['payload_kb'] = len(comparison_tab().to_json()) / 1024
+
+    results['cleaner_analyze'] = measure(lambda: analyze(raw), repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print stages that got slower than the baseline by more than tolerance; return how many."""
+    regressions = 0
+    for stage, result in results.items():
+        before = baseline.get('results', {}).get(stage)
+        if not before or not before.get('seconds'):
+            continue
+        ratio = result['seconds'] / before['seconds']
+        if ratio > 1 + tolerance:
+            regressions += 1
+            print(f"REGRESSION {stage}: {before['seconds']:.4f}s -> {result['seconds']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard computations and the cleaner.")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"Baseline JSON (default: {BASELINE_PATH})")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Slowdown vs. baseline reported as a regression (default: 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="wtn_bench_")
+    try:
+        print(f"Generating {args.players} players x {args.years} years (seed {args.seed})...")
+        ratings, profiles = generate(args.players, args.years, args.seed)
+        data_dir = write(work_dir, ratings, profiles)
+        print(f"{len(ratings)} rating rows, {os.path.getsize(os.path.join(data_dir, 'wtn_ratings.csv')) / 2**20:.1f} MB CSV\n")
+        results = run_stages(data_dir, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'Stage':<28}{'Seconds':>10}{'Peak MB':>10}")
+    for stage, result in results.items():
+        peak = f"{result['peak_mb']:.1f}" if result['peak_mb'] is not None else "-"
+        print(f"{stage:<28}{result['seconds']:>10.4f}{peak:>10}")
+
+    run = {
+        'params': {'players': args.players, 'years': args.years, 'seed': args.seed, 'rows': len(ratings)},
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'pandas': pd.__version__},
+        'results': results,
+    }
+
+    regressions = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('params') != run['params']:
+            print(f"\nBaseline was recorded with {baseline.get('params')}; not comparing")
+        else:
+            print()
+            regressions = compare(results, baseline, args.tolerance)
+            print(f"{regressions} regression(s) vs. {args.baseline}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for usta.com profile pages, for offline scraper benchmarks.
+
+Serves pages with the same v-form-wtn-widget__section* markup as the live site:
+- /...profile.html#uaid=<uaid>  a page whose widget is rendered by JavaScript after
+  --render-delay ms, with values filled in after a further --fill-delay ms
+  (for the Selenium backend)
+- /...profile.html?uaid=<uaid>  the widget markup served directly (for the HTTP backend)
+
+Ratings are templated deterministically from the UAID, or taken from recorded pages
+in --pages-dir (<uaid>.html) when present. Latency, error rate and missing widgets
+are configurable.
+
+Usage:
+    python benchmarks/fixture_server.py --port 8765 --latency 300 --error-rate 0.05
+    python scrape_wtn_ratings.py --benchmark --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+SECTION = """<div class="v-form-wtn-widget__section">
+  <div class="v-form-wtn-widget__section-title">WTN {title}</div>
+  <div class="v-form-wtn-widget__section-value">{rating}</div>
+  <div class="v-form-wtn-widget__section-confidence">{confidence} Confidence</div>
+  <div class="v-form-wtn-widget__section-subtitle">Last Played {played}</div>
+  <div class="v-form-wtn-widget__section-subtitle">Updated {updated}</div>
+</div>"""
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Player Profile</title></head>
+<body>
+<div id="app">Loading...</div>
+<script>
+  var uaid = (location.hash.match(/uaid=(\\d+)/) || [])[1];
+  setTimeout(function () {{
+    fetch(location.pathname + "?uaid=" + uaid + "&shell=1").then(function (r) {{ return r.text(); }})
+      .then(function (shell) {{
+        document.getElementById("app").innerHTML = shell;
+        setTimeout(function () {{
+          fetch(location.pathname + "?uaid=" + uaid).then(function (r) {{ return r.text(); }})
+            .then(function (html) {{ document.getElementById("app").innerHTML = html; }});
+        }}, {fill_delay});
+      }});
+  }}, {render_delay});
+</script>
+</body></html>"""
+
+
+class FixtureConfig:
+    """Behaviour knobs shared by all request handlers."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, missing_rate=0.0,
+                 render_delay=500, fill_delay=200, pages_dir=None, updated="01/28/2026", seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.missing_rate = missing_rate
+        self.render_delay = render_delay
+        self.fill_delay = fill_delay
+        self.pages_dir = pages_dir
+        self.updated = updated
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def roll(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random()
+
+
+def templated_widget(uaid, updated, shell=False):
+    """Deterministic widget markup for a UAID; shell=True leaves the values empty."""
+    digest = int(hashlib.sha1(str(uaid).encode()).hexdigest(), 16)
+    doubles = 15 + (digest % 2500) / 100
+    singles = 15 + (digest // 2500 % 2500) / 100
+    confidence = ['High', 'Medium', 'Low'][digest % 3]
+    sections = [('DOUBLES', doubles)] + ([('SINGLES', singles)] if digest % 3 == 0 else [])
+    if shell:
+        return "".join(
+            SECTION.format(title=title, rating="", confidence="", played="", updated="").replace("Updated ", "")
+            for title, _ in sections
+        )
+    return "".join(
+        SECTION.format(title=title, rating=f"{rating:.2f}", confidence=confidence,
+                       played="01/10/2026", updated=updated)
+        for title, rating in sections
+    )
+
+
+def make_handler(config):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            uaid = query.get('uaid', [None])[0]
+            shell = 'shell' in query
+
+            # Only the first request of a page load pays latency and can fail
+            if not shell:
+                if config.latency or config.jitter:
+                    time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)) / 1000)
+                if config.roll() < config.error_rate:
+                    self._send(500, "Internal Server Error", "text/plain")
+                    return
+
+            if not url.path.endswith("profile.html"):
+                self._send(404, "Not Found", "text/plain")
+                return
+            if uaid is None:
+                self._send(200, PAGE.format(render_delay=config.render_delay, fill_delay=config.fill_delay))
+                return
+
+            # Some players have no WTN widget at all
+            if int(hashlib.md5(uaid.encode()).hexdigest(), 16) % 1000 < config.missing_rate * 1000:
+                self._send(200, "<p>No World Tennis Number</p>")
+                return
+
+            recorded = os.path.join(config.pages_dir, f"{uaid}.html") if config.pages_dir else None
+            if recorded and os.path.exists(recorded) and not shell:
+                with open(recorded, encoding="utf-8") as f:
+                    self._send(200, f.read())
+                return
+            self._send(200, templated_widget(uaid, config.updated, shell=shell))
+
+    return FixtureHandler
+
+
+def start_server(config, host="127.0.0.1", port=0):
+    """Start the fixture server in a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture WTN profile pages for scraper benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="Response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Random +/- latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--missing-rate", type=float, default=0, help="Share of players with no WTN widget")
+    parser.add_argument("--render-delay", type=int, default=500, help="ms before the widget container appears")
+    parser.add_argument("--fill-delay", type=int, default=200, help="ms after that before values are filled in")
+    parser.add_argument("--pages-dir", help="Directory of recorded <uaid>.html widget pages")
+    args = parser.parse_args()
+
+    config = FixtureConfig(args.latency, args.jitter, args.error_rate, args.missing_rate,
+                           args.render_delay, args.fill_delay, args.pages_dir)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"Serving fixture profiles on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
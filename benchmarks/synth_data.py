@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic data generator for benchmarks.
+Writes a wtn_ratings.csv / wtn_profile_links.csv pair shaped like the real files:
+weekly ratings for both formats, a mix of "2026-01-21" and "01/28/2026" date
+strings, Low/Medium/High confidence, injected duplicate rows and one sentinel
+run (a bad scrape where many players got the same rating).
+
+Usage:
+    python benchmarks/synth_data.py --players 10000 --years 5 --out /tmp/wtn_synth
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+PROFILE_URL = "https://www.usta.com/en/home/play/player-search/profile.html#uaid={uaid}&tab=tournaments"
+NTRP_LEVELS = ['2.5C', '3.0C', '3.0S', '3.5C', '3.5S', '4.0C', '4.0S', '4.5C', '5.0C']
+FIRST_NAMES = ['Donna', 'Lois', 'Tamara', 'Teresa', 'Carrie', 'Mary', 'Lorna', 'Tina', 'Chana', 'Veronica',
+               'Zoë', 'José', 'Renée', 'Ana', 'Kim', 'Priya', 'Mei', 'Olga', 'Sara', 'Beth']
+LAST_NAMES = ['Baxter', 'Gibson', 'Phillips', 'Neal', 'Willis', 'Chennault', 'Goth', 'Clancy', 'Dolbey',
+              'Roberts', 'Núñez', 'Okafor', 'Larsen', 'Nguyen', 'Müller', 'Patel', 'Smith', 'Kowalski']
+
+
+def generate(players=1000, years=1, seed=0, singles_share=0.3, duplicate_share=0.01, sentinel=True):
+    """
+    Build synthetic ratings and profiles.
+
+    Args:
+        players: Number of players on the roster
+        years: Years of weekly history
+        seed: Random seed; the same arguments always give the same data
+        singles_share: Share of players who also have a singles rating
+        duplicate_share: Share of rows duplicated (half exact, half with a slightly different rating)
+        sentinel: Inject a bad scrape run where a third of one week's ratings read 34.21
+
+    Returns:
+        tuple: (ratings DataFrame, profiles DataFrame) with the CSV column layouts
+    """
+    rng = np.random.default_rng(seed)
+    uaids = rng.choice(np.arange(2_010_000_000, 2_020_000_000), size=players, replace=False)
+    names = [
+        f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}"
+        for i in range(players)
+    ]
+    profiles = pd.DataFrame({
+        'Name': names,
+        'NTRP_2026': rng.choice(NTRP_LEVELS, size=players),
+        'UAID': uaids,
+        'WTN_Profile': [PROFILE_URL.format(uaid=uaid) for uaid in uaids],
+    })
+
+    weeks = pd.date_range(end="2026-01-28", periods=int(years * 52), freq="7D")
+    frames = []
+    for format_name, share in (('Doubles', 1.0), ('Singles', singles_share)):
+        members = np.flatnonzero(rng.random(players) < share)
+        # Each player starts at some point in the history and random-walks from a base rating
+        start = rng.integers(0, len(weeks), size=len(members))
+        base = rng.uniform(15, 40, size=len(members))
+        counts = len(weeks) - start
+        player_idx = np.repeat(np.arange(len(members)), counts)
+        week_idx = np.concatenate([np.arange(s, len(weeks)) for s in start]) if len(members) else np.array([], int)
+        steps = rng.normal(0, 0.15, size=len(player_idx))
+        walk = pd.Series(steps).groupby(player_idx).cumsum().to_numpy()
+        frames.append(pd.DataFrame({
+            'Name': np.array(names)[members][player_idx],
+            'UAID': uaids[members][player_idx],
+            'Date': weeks[week_idx],
+            'Format': format_name,
+            'Rating': np.clip(base[player_idx] + walk, 1, 40).round(2),
+            'Confidence': rng.choice(['High', 'Medium', 'Low'], size=len(player_idx), p=[0.6, 0.3, 0.1]),
+        }))
+    ratings = pd.concat(frames, ignore_index=True).sort_values(['Date', 'Format', 'UAID'], kind='stable')
+
+    if sentinel and len(ratings):
+        last_week = ratings['Date'] == weeks[-1]
+        bad = ratings[last_week].sample(frac=1 / 3, random_state=seed).copy()
+        bad['Rating'] = 34.21
+        ratings = pd.concat([ratings, bad])
+
+    if duplicate_share:
+        dupes = ratings.sample(frac=duplicate_share, random_state=seed + 1).copy()
+        near = rng.random(len(dupes)) < 0.5
+        # Nudge down at the top of the scale so near duplicates stay valid WTN values
+        nudge = np.where(dupes.loc[near, 'Rating'] >= 40, -0.01, 0.01)
+        dupes.loc[near, 'Rating'] = (dupes.loc[near, 'Rating'] + nudge).round(2)
+        ratings = pd.concat([ratings, dupes])
+
+    # The real file mixes ISO dates with the MM/DD/YYYY strings the scraper writes
+    ratings = ratings.reset_index(drop=True)
+    iso = ratings['Date'].dt.isocalendar().week.to_numpy() % 2 == 0
+    ratings['Date'] = np.where(iso, ratings['Date'].dt.strftime("%Y-%m-%d"), ratings['Date'].dt.strftime("%m/%d/%Y"))
+    return ratings, profiles
+
+
+def write(out_dir, ratings, profiles):
+    """Write the pair to out_dir/data/ with the same names and encodings as the real files."""
+    data_dir = os.path.join(out_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    ratings.to_csv(os.path.join(data_dir, "wtn_ratings.csv"), index=False)
+    profiles.to_csv(os.path.join(data_dir, "wtn_profile_links.csv"), index=False, encoding='utf-8-sig')
+    return data_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic WTN ratings and profiles.")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--singles-share", type=float, default=0.3)
+    parser.add_argument("--duplicate-share", type=float, default=0.01)
+    parser.add_argument("--no-sentinel", action="store_true")
+    parser.add_argument("--out", required=True, help="Directory to write data/ into")
+    args = parser.parse_args()
+
+    ratings, profiles = generate(args.players, args.years, args.seed, args.singles_share,
+                                 args.duplicate_share, not args.no_sentinel)
+    data_dir = write(args.out, ratings, profiles)
+    print(f"Wrote {len(ratings)} ratings for {len(profiles)} players to {data_dir}")
+
+
+if __name__ == "__main__":
+    main()
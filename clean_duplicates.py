@@ -1,52 +1,193 @@
 #!/usr/bin/env python3
 """
-Remove duplicate rows from the bad scraping run.
-Keep rows where rating is 34.21 ONLY if the player has no other entry for that date/format.
+Find and remove duplicate and anomalous rows in the ratings history.
+
+Works on the whole file in one vectorized pass (groupby/transform, no per-row loops):
+- exact duplicates: the same (UAID, Date, Format) row stored more than once
+- near duplicates: several rows for one (UAID, Date, Format) whose ratings agree
+  within a tolerance, and conflicts where they don't
+- sentinel ratings: one value shared by an implausible share of players on a
+  date, like the 34.21 bad run on 01/28/2026
+- impossible jumps between a player's consecutive ratings
+- rows that don't fit the ratings schema (bad UAID, date, format or rating),
+  reported and removed rather than coerced
+
+Usage:
+    python clean_duplicates.py --dry-run          # report only
+    python clean_duplicates.py                    # clean data/wtn_ratings.csv in place
 """
 
+import argparse
+
 import pandas as pd
 
-# Read the CSV
-df = pd.read_csv('data/wtn_ratings.csv')
+from rating_trends import update_trends
+from ratings_schema import report_rejected, validate_ratings
+from ratings_store import rebuild_from_csv
+
+
+RATINGS_CSV = "data/wtn_ratings.csv"
+
+KEY = ['UAID', '_date', 'Format']
+
+# Defaults for the detectors
+NEAR_TOLERANCE = 0.05       # ratings this close on the same key are the same reading
+SENTINEL_SHARE = 0.10       # share of a date's players with one identical rating
+SENTINEL_MIN_PLAYERS = 5    # ...and at least this many of them
+MAX_JUMP = 5.0              # largest believable change between consecutive ratings
+
+
+def analyze(df, tolerance=NEAR_TOLERANCE, sentinel_share=SENTINEL_SHARE,
+            sentinel_min_players=SENTINEL_MIN_PLAYERS, max_jump=MAX_JUMP,
+            keep='last', prefer_non_sentinel=True, drop_sentinels=False, drop_jumps=False):
+    """
+    Flag duplicate and anomalous rows and decide which to drop.
+
+    Args:
+        df: Ratings frame with the wtn_ratings.csv columns (dates may be mixed format)
+        tolerance: Max rating spread for rows on one key to count as near duplicates
+        sentinel_share: Share of a date's players sharing one rating that marks it a sentinel
+        sentinel_min_players: Minimum number of players sharing a sentinel rating
+        max_jump: Flag changes between consecutive ratings larger than this
+        keep: Which row of a duplicate group survives, 'first' or 'last' in file order
+        prefer_non_sentinel: Within a duplicate group, never keep a sentinel row over a normal one
+        drop_sentinels: Also drop sentinel rows that have no duplicate
+        drop_jumps: Also drop rows flagged as impossible jumps
+
+    Returns:
+        DataFrame: One row per input row (same index) with boolean columns
+            exact_duplicate, near_duplicate, conflict, sentinel, jump, drop
+    """
+    work = pd.DataFrame({
+        'UAID': df['UAID'],
+        'Format': df['Format'],
+        '_date': pd.to_datetime(df['Date'], format='mixed').dt.normalize(),
+        '_rating': pd.to_numeric(df['Rating'], errors='coerce'),
+        '_order': range(len(df)),
+    }, index=df.index)
+    flags = pd.DataFrame(index=df.index)
+
+    # Sentinels: a rating shared by too many players on one date and format
+    by_date = work.groupby(['_date', 'Format'], sort=False)['UAID']
+    sharing = work.groupby(['_date', 'Format', '_rating'], sort=False)['UAID'].transform('nunique')
+    flags['sentinel'] = (
+        (sharing >= sentinel_min_players)
+        & (sharing / by_date.transform('nunique') >= sentinel_share)
+    )
+
+    # Exact duplicates: identical key, rating and confidence
+    exact_cols = KEY + ['_rating']
+    work['_confidence'] = df['Confidence'].fillna('')
+    flags['exact_duplicate'] = work.duplicated(exact_cols + ['_confidence'], keep=keep)
+
+    # Near duplicates and conflicts among the remaining rows on the same key
+    groups = work.groupby(KEY, sort=False)['_rating']
+    size = groups.transform('size')
+    spread = groups.transform('max') - groups.transform('min')
+    multi = size > 1
+    flags['near_duplicate'] = multi & (spread <= tolerance)
+    flags['conflict'] = multi & (spread > tolerance)
+
+    # Resolve each key to one surviving row: non-sentinel first, then by file order
+    work['_sentinel_rank'] = flags['sentinel'].astype(int) if prefer_non_sentinel else 0
+    order_rank = work['_order'] if keep == 'first' else -work['_order']
+    work['_priority'] = order_rank
+    ranked = work.sort_values(['_sentinel_rank', '_priority'])
+    survivor = ~ranked.duplicated(KEY, keep='first')
+    drop = ~survivor.reindex(df.index)
+
+    if drop_sentinels:
+        drop |= flags['sentinel']
+
+    # Jumps between consecutive surviving ratings of a player
+    kept = work[~drop].sort_values(['UAID', 'Format', '_date'])
+    step = kept.groupby(['UAID', 'Format'], sort=False)['_rating'].diff().abs()
+    flags['jump'] = (step > max_jump).reindex(df.index, fill_value=False)
+    if drop_jumps:
+        drop |= flags['jump']
+
+    flags['drop'] = drop
+    return flags[['exact_duplicate', 'near_duplicate', 'conflict', 'sentinel', 'jump', 'drop']]
+
+
+def report(df, flags, limit=10):
+    """Print a summary of what analyze() found and would drop."""
+    print(f"Total rows: {len(df)}")
+    for column in ['exact_duplicate', 'near_duplicate', 'conflict', 'sentinel', 'jump']:
+        print(f"  {column.replace('_', ' ').capitalize()} rows: {int(flags[column].sum())}")
+    print(f"Rows to remove: {int(flags['drop'].sum())}")
+
+    sentinels = df[flags['sentinel']]
+    if not sentinels.empty:
+        print("\nSentinel ratings (date, format, rating: players):")
+        counts = sentinels.groupby(['Date', 'Format', 'Rating']).size().sort_values(ascending=False)
+        for (date, format_name, rating), count in counts.head(limit).items():
+            print(f"  {date} {format_name} {rating}: {count}")
 
-print(f"Total rows before cleaning: {len(df)}")
+    dropped = df[flags['drop']]
+    if not dropped.empty:
+        print(f"\nFirst {min(limit, len(dropped))} rows to remove:")
+        print(dropped.head(limit).to_string())
 
-# Find rows with date 01/28/2026 and rating 34.21
-bad_scrape_mask = (df['Date'] == '01/28/2026') & (df['Rating'] == 34.21)
-bad_scrape_df = df[bad_scrape_mask]
 
-print(f"Rows with 34.21 rating on 01/28/2026: {len(bad_scrape_df)}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate and anomalous WTN ratings rows.")
+    parser.add_argument("--input", default=RATINGS_CSV, help=f"Ratings CSV (default: {RATINGS_CSV})")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--keep", choices=["first", "last"], default="last",
+                        help="Which row of a duplicate group to keep, in file order (default: last)")
+    parser.add_argument("--allow-sentinel-winner", action="store_true",
+                        help="Don't prefer normal rows over sentinel rows when resolving duplicates")
+    parser.add_argument("--drop-sentinels", action="store_true",
+                        help="Also drop sentinel ratings that have no duplicate")
+    parser.add_argument("--drop-jumps", action="store_true",
+                        help="Also drop ratings that jump more than --max-jump from the previous one")
+    parser.add_argument("--tolerance", type=float, default=NEAR_TOLERANCE,
+                        help=f"Rating spread treated as a near duplicate (default: {NEAR_TOLERANCE})")
+    parser.add_argument("--sentinel-share", type=float, default=SENTINEL_SHARE,
+                        help=f"Share of a date's players with one rating that marks a sentinel (default: {SENTINEL_SHARE})")
+    parser.add_argument("--keep-rejected", action="store_true",
+                        help="Keep rows that don't fit the ratings schema instead of removing them")
+    parser.add_argument("--max-jump", type=float, default=MAX_JUMP,
+                        help=f"Largest believable change between consecutive ratings (default: {MAX_JUMP})")
+    return parser.parse_args(argv)
 
-# For each player with 34.21, check if they have another entry for the same date and format
-rows_to_remove = []
 
-for idx, row in bad_scrape_df.iterrows():
-    name = row['Name']
-    date = row['Date']
-    format_type = row['Format']
+def main(argv=None):
+    args = parse_args(argv)
 
-    # Find all rows for this player with same date and format
-    same_player_mask = (df['Name'] == name) & (df['Date'] == date) & (df['Format'] == format_type)
-    same_player_df = df[same_player_mask]
+    raw = pd.read_csv(args.input, encoding='utf-8-sig')
+    valid, rejected = validate_ratings(raw)
+    report_rejected(rejected, args.input)
+    df = raw.loc[valid.index]
+    flags = analyze(
+        df,
+        tolerance=args.tolerance,
+        sentinel_share=args.sentinel_share,
+        max_jump=args.max_jump,
+        keep=args.keep,
+        prefer_non_sentinel=not args.allow_sentinel_winner,
+        drop_sentinels=args.drop_sentinels,
+        drop_jumps=args.drop_jumps,
+    )
+    report(df, flags)
 
-    # If there are multiple rows and one is 34.21, remove the 34.21 one
-    if len(same_player_df) > 1:
-        # Check if there's a non-34.21 entry
-        non_bad_entries = same_player_df[same_player_df['Rating'] != 34.21]
-        if len(non_bad_entries) > 0:
-            # Keep the non-34.21 entry, remove this 34.21 entry
-            rows_to_remove.append(idx)
-            print(f"Removing duplicate 34.21 for {name} (has correct value: {non_bad_entries.iloc[0]['Rating']})")
-    else:
-        # Only one entry - this is the actual rating, keep it
-        print(f"Keeping 34.21 for {name} (no duplicate found)")
+    if args.dry_run:
+        print("\nDry run: nothing written")
+        return
 
-# Remove the identified rows
-df_cleaned = df.drop(rows_to_remove)
+    df_cleaned = df[~flags['drop']]
+    if args.keep_rejected:
+        df_cleaned = raw.loc[raw.index.isin(df_cleaned.index) | raw.index.isin(rejected.index)]
+    elif not rejected.empty:
+        print(f"\nRemoving {len(rejected)} rows rejected by the ratings schema")
+    print(f"\nTotal rows after cleaning: {len(df_cleaned)}")
+    df_cleaned.to_csv(args.input, index=False)
+    print("Cleaned CSV saved!")
+    if args.input == RATINGS_CSV:
+        rebuild_from_csv(args.input)
+        update_trends()
 
-print(f"\nTotal rows removed: {len(rows_to_remove)}")
-print(f"Total rows after cleaning: {len(df_cleaned)}")
 
-# Save the cleaned CSV
-df_cleaned.to_csv('data/wtn_ratings.csv', index=False)
-print("\nCleaned CSV saved!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Comparison chart builder for the Doubles/Singles Comparison tabs.
+Renders with WebGL (Scattergl), finds each player's last point with one groupby,
+pages through players instead of drawing everyone at once, and downsamples long
+series with LTTB so payload size and render time stay bounded as the roster grows.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+
+
+MAX_POINTS_PER_SERIES = 200
+DEFAULT_PAGE_SIZE = 25
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with its neighbours, which preserves the visual
+    shape of a line far better than striding.
+
+    Args:
+        x: Numeric x values (sorted ascending)
+        y: y values
+        threshold: Number of points to keep
+
+    Returns:
+        ndarray: Indices of the points to keep
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(data, max_points=MAX_POINTS_PER_SERIES):
+    """Downsample each player's series in a comparison frame to at most max_points."""
+    counts = data.groupby('UAID', sort=False).size()
+    long_players = counts[counts > max_points].index
+    if long_players.empty:
+        return data
+    short = data[~data['UAID'].isin(long_players)]
+    parts = [short]
+    for _, series in data[data['UAID'].isin(long_players)].groupby('UAID', sort=False):
+        x = series['Date'].to_numpy().astype('datetime64[s]').astype(float)
+        parts.append(series.iloc[lttb(x, series['Rating'].to_numpy(), max_points)])
+    return pd.concat(parts).sort_values(['UAID', 'Date'])
+
+
+def select_players(data, min_points=2, cohort=None, profiles=None):
+    """
+    Players eligible for a comparison chart, best latest rating first.
+
+    Args:
+        data: Ratings for one format (UAID, Name, Date, Rating)
+        min_points: Minimum number of ratings a player needs
+        cohort: Optional list of NTRP_2026 levels to keep
+        profiles: Profile links frame, needed for cohort filtering
+
+    Returns:
+        DataFrame: UAID, Name, Rating (latest), Points, sorted by latest rating
+    """
+    ordered = data.sort_values('Date')
+    by_player = ordered.groupby('UAID', sort=False)
+    summary = by_player.agg(Name=('Name', 'last'), Rating=('Rating', 'last'), Points=('Rating', 'size'))
+    summary = summary[summary['Points'] >= min_points].reset_index()
+    if cohort and profiles is not None:
+        in_cohort = profiles.loc[profiles['NTRP_2026'].isin(cohort), 'UAID']
+        summary = summary[summary['UAID'].isin(in_cohort)]
+    return summary.sort_values(['Rating', 'Name']).reset_index(drop=True)
+
+
+def page_of(players, page=0, page_size=DEFAULT_PAGE_SIZE):
+    """One page of the selected players."""
+    return players.iloc[page * page_size:(page + 1) * page_size]
+
+
+def build_comparison_figure(data, players, format_name, max_points=MAX_POINTS_PER_SERIES):
+    """
+    Build the comparison line chart for a set of players.
+
+    Args:
+        data: Ratings for one format (UAID, Name, Date, Rating)
+        players: Players to draw (from select_players/page_of)
+        format_name: 'Doubles' or 'Singles'
+        max_points: Per-series cap applied with LTTB
+
+    Returns:
+        plotly Figure
+    """
+    plot_data = data[data['UAID'].isin(players['UAID'])].sort_values(['UAID', 'Date'])
+    plot_data = downsample(plot_data, max_points)
+
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    names = dict(zip(players['UAID'], players['Name']))
+    order = {uaid: i for i, uaid in enumerate(players['UAID'])}
+    for uaid, series in sorted(plot_data.groupby('UAID', sort=False), key=lambda item: order[item[0]]):
+        fig.add_trace(go.Scattergl(
+            x=series['Date'], y=series['Rating'],
+            mode='lines+markers', name=names[uaid],
+            line=dict(color=colors[order[uaid] % len(colors)]),
+            marker=dict(size=5),
+        ))
+
+    # End-of-line labels: the last point of every player from one groupby
+    last = plot_data.groupby('UAID', sort=False).tail(1)
+    fig.add_trace(go.Scatter(
+        x=last['Date'], y=last['Rating'], text=last['UAID'].map(names),
+        mode='text', textposition='middle right', textfont=dict(size=10),
+        showlegend=False, hoverinfo='skip',
+    ))
+
+    fig.update_layout(
+        title=f'{format_name} Rating Comparison Over Time',
+        height=min(2000, max(600, 40 * len(players))),
+        yaxis_title=f"WTN {format_name} Rating",
+        xaxis_title="Date",
+        hovermode='x unified',
+        showlegend=True,
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=1.01
+        )
+    )
+    return fig
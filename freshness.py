@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Per-UAID freshness index for incremental scraping.
+Remembers when each player's WTN was last updated and when we last scraped them,
+so a run only schedules profiles whose rating could have changed since.
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+FRESHNESS_PATH = "data/wtn_freshness.csv"
+
+# WTN is republished weekly
+DEFAULT_CADENCE_DAYS = 7
+# Re-check a player at least this often even if no update is expected
+DEFAULT_MAX_AGE_DAYS = 28
+
+
+def parse_date(value):
+    """Parse a "01/28/2026" or "2026-01-28" date string, or return None."""
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(str(value), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_since(text):
+    """Parse a --since date, for use as an argparse type; unlike parse_date, bad input is an error."""
+    value = parse_date(text)
+    if value is None:
+        raise argparse.ArgumentTypeError(f"date must look like YYYY-MM-DD or MM/DD/YYYY, got {text!r}")
+    return value
+
+
+class FreshnessIndex:
+    """
+    Last WTN update date and last scrape time for every UAID.
+
+    Stored as a small CSV (UAID, Last_Updated, Last_Scraped) next to the ratings.
+    """
+
+    def __init__(self, path=FRESHNESS_PATH):
+        self.path = path
+        self.entries = {}
+
+    def load(self, ratings_csv=None):
+        """
+        Load the index from disk.
+
+        If there is no index yet and a ratings CSV is given, seed Last_Updated from
+        the latest date recorded for each player.
+        """
+        if os.path.exists(self.path):
+            df = pd.read_csv(self.path)
+            for row in df.itertuples(index=False):
+                self.entries[int(row.UAID)] = {
+                    'last_updated': parse_date(row.Last_Updated),
+                    'last_scraped': parse_date(row.Last_Scraped),
+                }
+        elif ratings_csv and os.path.exists(ratings_csv):
+            ratings = pd.read_csv(ratings_csv, usecols=['UAID', 'Date'])
+            ratings['Date'] = pd.to_datetime(ratings['Date'], format='mixed')
+            for uaid, last in ratings.groupby('UAID')['Date'].max().items():
+                self.entries[int(uaid)] = {'last_updated': last.to_pydatetime(), 'last_scraped': None}
+        return self
+
+    def save(self):
+        """Write the index atomically."""
+        rows = [
+            {
+                'UAID': uaid,
+                'Last_Updated': entry['last_updated'].strftime("%Y-%m-%d") if entry['last_updated'] else "",
+                'Last_Scraped': entry['last_scraped'].strftime("%Y-%m-%dT%H:%M:%S") if entry['last_scraped'] else "",
+            }
+            for uaid, entry in sorted(self.entries.items())
+        ]
+        tmp_path = self.path + ".tmp"
+        pd.DataFrame(rows, columns=['UAID', 'Last_Updated', 'Last_Scraped']).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def record(self, uaid, scraped_at, updated_date=None):
+        """Note that a profile was scraped, and the WTN updated date it showed."""
+        entry = self.entries.setdefault(int(uaid), {'last_updated': None, 'last_scraped': None})
+        entry['last_scraped'] = parse_date(scraped_at)
+        updated = parse_date(updated_date)
+        if updated and (entry['last_updated'] is None or updated > entry['last_updated']):
+            entry['last_updated'] = updated
+
+    def is_due(self, uaid, now, since=None, max_age_days=DEFAULT_MAX_AGE_DAYS, cadence_days=DEFAULT_CADENCE_DAYS):
+        """
+        Decide whether a profile could have changed and should be scraped.
+
+        Args:
+            uaid: Player UAID
+            now: Current datetime
+            since: If given, scrape players whose last known update is before this date
+            max_age_days: Always re-check players not scraped for this many days
+            cadence_days: WTN publishing cadence
+
+        Returns:
+            bool: True if the profile should be scraped this run
+        """
+        entry = self.entries.get(int(uaid))
+        if entry is None or entry['last_updated'] is None:
+            return True
+        last_updated = entry['last_updated']
+        last_scraped = entry['last_scraped']
+
+        if since is not None:
+            return last_updated < since
+
+        if last_scraped is None or now - last_scraped >= timedelta(days=max_age_days):
+            return True
+
+        # A new rating is only possible once the next publish date has passed,
+        # and only worth checking if we haven't looked since then.
+        next_expected = last_updated + timedelta(days=cadence_days)
+        return now >= next_expected and last_scraped < next_expected
+
+    def select_due(self, profiles_df, now=None, since=None, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                   cadence_days=DEFAULT_CADENCE_DAYS):
+        """Return the rows of profiles_df that are due for a scrape."""
+        now = now or datetime.now()
+        mask = profiles_df['UAID'].map(
+            lambda uaid: self.is_due(uaid, now, since, max_age_days, cadence_days)
+        )
+        return profiles_df[mask.astype(bool)]
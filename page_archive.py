@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Compressed, content-addressed archive of the raw WTN widget pages the scraper saw.
+
+Each page is stored once under objects/<sha256[:2]>/<sha256>.gz, keyed on the hash
+of its uncompressed content, so a profile that hasn't changed between runs costs
+one index line and no new object. The index (index.jsonl) records which player's
+page was seen when. `reparse` rebuilds ratings rows from the archive with the same
+parser as the HTTP backend, without touching the network.
+
+Usage:
+    python page_archive.py reparse --run-date 2026-01-28            # write data/reparsed_ratings.csv
+    python page_archive.py reparse --run-date 2026-01-28 --apply    # replace those rows in the store
+    python page_archive.py stats
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from rating_trends import update_trends
+from ratings_store import RATINGS_CSV, rebuild_from_csv
+from scrape_journal import RATINGS_COLUMNS, build_records, rating_keys
+from wtn_http import parse_wtn_response
+
+
+ARCHIVE_DIR = "data/page_archive"
+REPARSED_CSV = "data/reparsed_ratings.csv"
+
+
+class PageArchive:
+    """Raw pages on disk, deduplicated by content hash."""
+
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        self.index_path = os.path.join(path, "index.jsonl")
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest + ".gz")
+
+    def store(self, uaid, name, text, content_type="text/html", scraped_at=None):
+        """
+        Save one page and index it under the player.
+
+        Returns:
+            str: The page's sha256, its key in the archive
+        """
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        entry = {
+            'uaid': int(uaid),
+            'name': name,
+            'scraped_at': scraped_at or datetime.now().isoformat(timespec='seconds'),
+            'sha256': digest,
+            'content_type': content_type,
+        }
+        with self._lock:
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = object_path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    # mtime=0 keeps the compressed bytes a pure function of the content
+                    f.write(gzip.compress(data, mtime=0))
+                os.replace(tmp_path, object_path)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def load(self, digest):
+        """Text of an archived page."""
+        with open(self._object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def entries(self):
+        """Index entries, oldest first, skipping a torn last line."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def stats(self):
+        """Number of index entries and objects, and compressed bytes on disk."""
+        objects, size = 0, 0
+        for root, _, names in os.walk(os.path.join(self.path, "objects")):
+            for name in names:
+                if name.endswith(".gz"):
+                    objects += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        return {'entries': sum(1 for _ in self.entries()), 'objects': objects, 'bytes': size}
+
+
+def select_entries(entries, run_date=None, since=None, until=None, uaids=None):
+    """Filter index entries by scrape date (YYYY-MM-DD) and UAID."""
+    for entry in entries:
+        day = entry['scraped_at'][:10]
+        if run_date and day != run_date:
+            continue
+        if since and day < since:
+            continue
+        if until and day > until:
+            continue
+        if uaids and entry['uaid'] not in uaids:
+            continue
+        yield entry
+
+
+def reparse(archive, entries):
+    """
+    Rebuild ratings rows from archived pages.
+
+    When a player's page was archived more than once for the same rating date, the
+    latest capture wins.
+
+    Returns:
+        tuple: (DataFrame with the wtn_ratings.csv columns, number of pages parsed)
+    """
+    records, pages = [], 0
+    for entry in entries:
+        result = parse_wtn_response(archive.load(entry['sha256']), entry.get('content_type') or "")
+        row = {'Name': entry['name'], 'UAID': entry['uaid']}
+        records.extend(build_records(row, result, scrape_date=entry['scraped_at'][:10]))
+        pages += 1
+    df = pd.DataFrame(records, columns=RATINGS_COLUMNS)
+    if not df.empty:
+        df = df[~rating_keys(df).duplicated(keep='last')]
+    return df.reset_index(drop=True), pages
+
+
+def apply_reparsed(reparsed, ratings_csv=RATINGS_CSV):
+    """
+    Replace the stored rows for every reparsed (UAID, Date, Format) and add the
+    ones that are missing, then rebuild the Parquet and SQLite mirrors.
+
+    Returns:
+        tuple: (rows replaced, rows added)
+    """
+    df = pd.read_csv(ratings_csv, encoding='utf-8-sig')
+    stored = rating_keys(df)
+    new_keys = set(rating_keys(reparsed))
+    replaced = stored.isin(new_keys)
+    added = len(new_keys - set(stored))
+    updated = pd.concat([df[~replaced], reparsed], ignore_index=True)
+    updated.to_csv(ratings_csv, index=False)
+    if ratings_csv == RATINGS_CSV:
+        rebuild_from_csv(ratings_csv)
+        update_trends()
+    return int(replaced.sum()), added
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Raw WTN page archive.")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help=f"Archive directory (default: {ARCHIVE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reparse_parser = subparsers.add_parser("reparse", help="Rebuild ratings rows from archived pages")
+    reparse_parser.add_argument("--run-date", help="Only pages scraped on this date (YYYY-MM-DD)")
+    reparse_parser.add_argument("--since", help="Only pages scraped on or after this date (YYYY-MM-DD)")
+    reparse_parser.add_argument("--until", help="Only pages scraped on or before this date (YYYY-MM-DD)")
+    reparse_parser.add_argument("--uaid", type=int, action="append", help="Only this player (repeatable)")
+    reparse_parser.add_argument("--output", default=REPARSED_CSV,
+                                help=f"Where to write the rebuilt rows (default: {REPARSED_CSV})")
+    reparse_parser.add_argument("--apply", action="store_true",
+                                help=f"Replace the matching rows in {RATINGS_CSV} instead of only writing --output")
+
+    subparsers.add_parser("stats", help="Show archive size and deduplication")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    archive = PageArchive(args.archive)
+
+    if args.command == "stats":
+        stats = archive.stats()
+        print(f"Index entries: {stats['entries']}")
+        print(f"Unique pages:  {stats['objects']} ({stats['bytes'] / 1e3:.0f} KB compressed)")
+        return
+
+    entries = select_entries(archive.entries(), args.run_date, args.since, args.until,
+                             set(args.uaid) if args.uaid else None)
+    reparsed, pages = reparse(archive, entries)
+    print(f"Reparsed {pages} archived pages into {len(reparsed)} ratings rows")
+    if reparsed.empty:
+        return
+    reparsed.to_csv(args.output, index=False)
+    print(f"Rows written to {args.output}")
+    if args.apply:
+        replaced, added = apply_reparsed(reparsed)
+        print(f"Replaced {replaced} and added {added} rows in {RATINGS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-player index for the Player Ratings tab.
+Built once per data version: ratings are sorted by (UAID, Format, Date) a single
+time and each player maps to slices of that frame, so picking a player is a dict
+lookup instead of a scan over the full history.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+FORMATS = ('Singles', 'Doubles')
+
+
+def rating_axis_range(y_min, y_max):
+    """
+    Shared y-axis range for a player's charts.
+
+    Ensures at least a 2.0 range; wider ranges get 5% padding for visual comfort.
+    """
+    if y_min is None or pd.isna(y_min):
+        return None, None
+    range_size = y_max - y_min
+    if range_size < 2.0:
+        padding = (2.0 - range_size) / 2
+    else:
+        padding = range_size * 0.05
+    return y_min - padding, y_max + padding
+
+
+class PlayerIndex:
+    """
+    Mapping from UAID to a player's pre-sorted singles and doubles series.
+
+    Attributes:
+        players: DataFrame of (UAID, Name) sorted by name, for pickers
+    """
+
+    def __init__(self, ratings):
+        """
+        Args:
+            ratings: Ratings frame (UAID, Name, Date, Format, Rating, Confidence)
+        """
+        self._data = ratings.sort_values(['UAID', 'Format', 'Date']).reset_index(drop=True)
+        data = self._data
+
+        # Boundaries of each (UAID, Format) run in the sorted frame
+        uaids = data['UAID'].to_numpy()
+        formats = data['Format'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, (uaids[1:] != uaids[:-1]) | (formats[1:] != formats[:-1])])
+        ends = np.r_[starts[1:], len(data)]
+
+        self._entries = {}
+        for start, end in zip(starts, ends):
+            entry = self._entries.setdefault(int(uaids[start]), {})
+            entry[formats[start]] = (int(start), int(end))
+
+        # Latest name and y-axis range per player, vectorized over all players
+        by_player = data.groupby('UAID', sort=False)
+        names = data.sort_values('Date').drop_duplicates('UAID', keep='last').set_index('UAID')['Name']
+        lows = by_player['Rating'].min()
+        highs = by_player['Rating'].max()
+        for uaid, entry in self._entries.items():
+            entry['Name'] = names.get(uaid)
+            entry['y_range'] = rating_axis_range(lows.get(uaid), highs.get(uaid))
+
+        self.players = (
+            names.rename_axis('UAID').reset_index()
+            .sort_values('Name', kind='stable').reset_index(drop=True)
+        )
+
+    def __contains__(self, uaid):
+        return uaid in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def name(self, uaid):
+        return self._entries[uaid]['Name']
+
+    def y_range(self, uaid):
+        return self._entries[uaid]['y_range']
+
+    def series(self, uaid, format_name):
+        """A player's ratings for one format, oldest first (empty frame if none)."""
+        bounds = self._entries.get(uaid, {}).get(format_name)
+        if bounds is None:
+            return self._data.iloc[0:0]
+        return self._data.iloc[bounds[0]:bounds[1]]
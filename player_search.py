@@ -0,0 +1,132 @@
+"""
+Player search for the Player Ratings tab.
+Built once per data version over the rated players: names are accent- and
+case-folded and split into tokens, and the tokens are kept in one sorted array so
+each query token is a binary-search prefix lookup. Results are keyed by UAID,
+filtered by NTRP level and format, and paged, so the picker only ever holds one
+page of players however large the roster grows.
+"""
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+PAGE_SIZE = 25
+
+
+def fold(text):
+    """Lowercase text with accents removed and punctuation turned into spaces ('Núñez-Ortiz' -> 'nunez ortiz')."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return "".join(ch if ch.isalnum() else " " for ch in stripped)
+
+
+def tokens(text):
+    return fold(text).split()
+
+
+class PlayerSearch:
+    """
+    Prefix and token search over players, keyed by UAID.
+
+    Attributes:
+        players: DataFrame of UAID, Name, NTRP_2026, Label, Singles, Doubles, sorted by name
+        levels: NTRP levels present, for filter pickers
+    """
+
+    def __init__(self, players, ratings, profiles):
+        """
+        Args:
+            players: Players to index as (UAID, Name), e.g. PlayerIndex.players
+            ratings: Ratings frame, for which formats each player has
+            profiles: Profile links with UAID and NTRP_2026
+        """
+        cohorts = profiles.drop_duplicates('UAID', keep='last').set_index('UAID')['NTRP_2026']
+        rated = ratings[['UAID', 'Format']].drop_duplicates()
+        data = pd.DataFrame({'UAID': players['UAID'].to_numpy(), 'Name': players['Name'].astype(str).to_numpy()})
+        data['NTRP_2026'] = data['UAID'].map(cohorts)
+        for format_name in ('Singles', 'Doubles'):
+            data[format_name] = data['UAID'].isin(rated.loc[rated['Format'] == format_name, 'UAID'])
+        data['_folded'] = data['Name'].map(lambda name: " ".join(tokens(name)))
+        data = data.sort_values(['_folded', 'UAID'], kind='stable').reset_index(drop=True)
+
+        # Same name twice: the UAID tells them apart
+        level = data['NTRP_2026'].fillna("no NTRP")
+        data['Label'] = data['Name'] + " (" + level + ", " + data['UAID'].astype(str) + ")"
+        self.players = data.drop(columns='_folded')
+        self.levels = sorted(data['NTRP_2026'].dropna().unique())
+
+        self._folded = data['_folded'].to_numpy(dtype=object)
+        self._ntrp = data['NTRP_2026'].to_numpy(dtype=object)
+        self._formats = {format_name: data[format_name].to_numpy() for format_name in ('Singles', 'Doubles')}
+
+        # Every (token, row) pair, sorted by token, for prefix lookups
+        pairs = [(token, row) for row, name in enumerate(self._folded) for token in name.split()]
+        pairs.sort()
+        self._tokens = np.array([token for token, _ in pairs], dtype=object)
+        self._token_rows = np.array([row for _, row in pairs], dtype=np.int64)
+        # UAIDs as text, sorted the same way
+        uaids = data['UAID'].astype(str).to_numpy(dtype=object)
+        order = np.argsort(uaids, kind='stable')
+        self._uaids, self._uaid_rows = uaids[order], order
+
+    def __len__(self):
+        return len(self.players)
+
+    @staticmethod
+    def _prefix_rows(keys, rows, prefix):
+        """Rows whose key (in sorted keys) starts with prefix."""
+        start = np.searchsorted(keys, prefix, side='left')
+        end = np.searchsorted(keys, prefix + "\uffff", side='left')
+        return rows[start:end]
+
+    def match(self, query="", levels=None, format_name=None):
+        """
+        Rows of players matching a query, best matches first.
+
+        Every query token must be the start of some token of the player's name
+        ('ann sm' finds 'Anne Smith' and 'Smith, Annabel'); a number matches the
+        start of a UAID. Players whose whole name starts with the query rank first,
+        then the rest, each by name.
+
+        Args:
+            query: Search text (empty matches everyone)
+            levels: Only these NTRP levels
+            format_name: Only players with ratings in this format
+
+        Returns:
+            ndarray: Row positions in self.players
+        """
+        keep = np.ones(len(self.players), dtype=bool)
+        if levels:
+            keep &= np.isin(self._ntrp, list(levels))
+        if format_name:
+            keep &= self._formats[format_name]
+
+        words = tokens(query)
+        for word in words:
+            found = np.zeros(len(self.players), dtype=bool)
+            found[self._prefix_rows(self._tokens, self._token_rows, word)] = True
+            if word.isdigit():
+                found[self._prefix_rows(self._uaids, self._uaid_rows, word)] = True
+            keep &= found
+
+        rows = np.flatnonzero(keep)
+        if words:
+            whole = " ".join(words)
+            starts = np.fromiter((self._folded[row].startswith(whole) for row in rows), bool, len(rows))
+            rows = np.concatenate([rows[starts], rows[~starts]])
+        return rows
+
+    def search(self, query="", levels=None, format_name=None, page=0, page_size=PAGE_SIZE):
+        """
+        One page of matching players.
+
+        Returns:
+            tuple: (DataFrame page of self.players, total number of matches)
+        """
+        rows = self.match(query, levels, format_name)
+        shown = rows[page * page_size:(page + 1) * page_size]
+        return self.players.iloc[shown], len(rows)
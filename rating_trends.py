@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Rating-trend analytics, computed in one batch after each scrape.
+
+For every (UAID, Format) series it derives the change from the previous rating,
+a rolling mean and least-squares slope over the last few ratings, and for every
+date the player's percentile within their NTRP_2026 cohort. Everything is
+vectorized over all players at once (grouped cumulative sums, no per-player
+loops). The results are written to data/rating_trends/, where the dashboard's
+Movers tab reads them as they are.
+
+WTN counts down: a lower rating is a better player, so a negative change or
+slope is an improvement, and the 100th percentile is the best of the cohort.
+
+Usage:
+    python rating_trends.py          # rebuild from the ratings store
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import ratings_schema
+import ratings_store
+
+
+TRENDS_DIR = "data/rating_trends"
+TRENDS_PATH = os.path.join(TRENDS_DIR, "trends.parquet")
+MOVERS_PATH = os.path.join(TRENDS_DIR, "movers.parquet")
+
+# Ratings in the rolling mean and slope
+ROLLING_POINTS = 4
+# Look-back periods for the movers table, in days
+CHANGE_WINDOWS = {'Change_30d': 30, 'Change_90d': 90}
+
+TREND_COLUMNS = ['UAID', 'Name', 'Format', 'NTRP_2026', 'Date', 'Rating', 'Delta', 'Days',
+                 'Rolling_Mean', 'Slope_30d', 'Percentile', 'Cohort_Size']
+MOVER_COLUMNS = ['UAID', 'Name', 'Format', 'NTRP_2026', 'Date', 'Rating', 'Points',
+                 'Rolling_Mean', 'Slope_30d', 'Percentile', 'Cohort_Size'] + list(CHANGE_WINDOWS)
+
+
+def _window_sum(values, groups, window):
+    """Sum of each row's value and the window - 1 before it in its group."""
+    total = values.groupby(groups).cumsum()
+    return total - total.groupby(groups).shift(window).fillna(0.0)
+
+
+def compute_trends(ratings, profiles, window=ROLLING_POINTS):
+    """
+    Per-rating trend columns for every player.
+
+    Args:
+        ratings: Ratings frame (Low confidence already excluded)
+        profiles: Profile links with UAID and NTRP_2026
+        window: Number of ratings in the rolling mean and slope
+
+    Returns:
+        DataFrame: One row per rating with TREND_COLUMNS. Delta and Days are relative
+            to the player's previous rating in the format; Slope_30d is in rating
+            points per 30 days; Percentile is 0-100 within (Date, Format, NTRP_2026)
+    """
+    cohorts = profiles.drop_duplicates('UAID', keep='last').set_index('UAID')['NTRP_2026']
+    data = ratings.sort_values(['UAID', 'Format', 'Date'], kind='stable').reset_index(drop=True)
+    data['NTRP_2026'] = data['UAID'].map(cohorts)
+    groups = data.groupby(['UAID', 'Format'], sort=False, observed=True).ngroup()
+
+    # Ratings are held as float32; WTN has two decimals, so round back to exact values
+    rating = data['Rating'].astype('float64').round(2)
+    data['Delta'] = rating - rating.groupby(groups).shift()
+    data['Days'] = data['Date'].diff().dt.days.where(groups == groups.shift())
+
+    # Rolling least squares over the last `window` ratings from running sums of
+    # x, y, x*x and x*y, with x in days since the series began
+    x = (data['Date'] - data.groupby(groups)['Date'].transform('first')).dt.days.astype('float64')
+    n = np.minimum(data.groupby(groups).cumcount() + 1, window).astype('float64')
+    sx, sy = _window_sum(x, groups, window), _window_sum(rating, groups, window)
+    sxx, sxy = _window_sum(x * x, groups, window), _window_sum(x * rating, groups, window)
+    denominator = n * sxx - sx * sx
+    data['Rolling_Mean'] = sy / n
+    data['Slope_30d'] = ((n * sxy - sx * sy) / denominator.where(denominator > 0)) * 30
+
+    # Lower is better, so rank descending: the best rating of a cohort gets 100
+    cohort = data.groupby(['Date', 'Format', 'NTRP_2026'], observed=True)['Rating']
+    data['Percentile'] = cohort.rank(ascending=False, method='max', pct=True) * 100
+    data['Cohort_Size'] = cohort.transform('size').astype('Int64')
+    return ratings_schema.compact(data[TREND_COLUMNS])
+
+
+def compute_movers(trends, windows=CHANGE_WINDOWS):
+    """
+    Latest trend row per (UAID, Format), with the change over each look-back window.
+
+    A change is the latest rating minus the last one on or before the window's
+    start, or minus the player's first rating when their history is shorter than the
+    window. It is missing for players with a single rating.
+    """
+    # compute_trends sorts by (UAID, Format, Date), so first and last rows line up per series
+    trends = trends.assign(Points=trends.groupby(['UAID', 'Format'], observed=True).cumcount() + 1)
+    latest = trends.drop_duplicates(['UAID', 'Format'], keep='last').reset_index(drop=True)
+    current = latest['Rating'].astype('float64').round(2).to_numpy()
+    first = trends.drop_duplicates(['UAID', 'Format'], keep='first')['Rating'].astype('float64').round(2).to_numpy()
+    single = latest['Points'].to_numpy() == 1
+
+    history = trends[['UAID', 'Format', 'Date', 'Rating']].assign(
+        Format=trends['Format'].astype(str), Rating=trends['Rating'].astype('float64').round(2))
+    history = history.sort_values('Date', kind='stable').rename(columns={'Date': '_date', 'Rating': '_earlier'})
+    for column, days in windows.items():
+        start = latest[['UAID', 'Format']].assign(
+            Format=latest['Format'].astype(str), _start=latest['Date'] - pd.Timedelta(days=days),
+            _order=range(len(latest)))
+        earlier = pd.merge_asof(
+            start.sort_values('_start'), history,
+            left_on='_start', right_on='_date', by=['UAID', 'Format'], direction='backward',
+        ).sort_values('_order')['_earlier'].to_numpy()
+        change = current - np.where(np.isnan(earlier), first, earlier)
+        latest[column] = np.where(single, np.nan, change)
+    return latest[MOVER_COLUMNS]
+
+
+def _write(df, path):
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def update_trends(ratings=None, profiles=None, trends_dir=TRENDS_DIR):
+    """
+    Recompute the trend and movers tables from the ratings store and write them.
+
+    Returns:
+        tuple: (trends, movers) DataFrames
+    """
+    if ratings is None:
+        ratings = ratings_store.load_ratings()
+    if profiles is None:
+        profiles = ratings_store.load_profiles()
+    trends = compute_trends(ratings, profiles)
+    movers = compute_movers(trends)
+    os.makedirs(trends_dir, exist_ok=True)
+    _write(trends, os.path.join(trends_dir, os.path.basename(TRENDS_PATH)))
+    _write(movers, os.path.join(trends_dir, os.path.basename(MOVERS_PATH)))
+    print(f"Rating trends updated: {len(trends)} ratings, {len(movers)} player series in {trends_dir}")
+    return trends, movers
+
+
+def load_movers(path=MOVERS_PATH):
+    """The movers table written by update_trends, or None if it hasn't been built."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def main():
+    update_trends()
+
+
+if __name__ == "__main__":
+    main()
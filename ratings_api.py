@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Read-only JSON API over the ratings store, for tools that poll the data.
+
+Backed by the same RatingsCache and ratings_store helpers as the dashboard, so it
+serves exactly what the app shows (Low confidence ratings excluded). Every
+response carries an ETag derived from the data version; a client that sends it
+back in If-None-Match gets a bodiless 304 until the ratings or roster change.
+Bodies are gzipped for clients that accept it, and list endpoints page with an
+opaque cursor (keyset on the sort order, so pages stay consistent while new
+ratings arrive).
+
+Endpoints:
+    GET /                                 data version, latest date and endpoint list
+    GET /roster                           profile links, by name
+    GET /snapshot?format=Singles          latest rating per (UAID, Format)
+    GET /leaderboard?format=Singles&ntrp=3.5C
+                                          latest ratings, best first
+    GET /players/<uaid>/history?format=Doubles
+                                          one player's ratings, oldest first
+
+List endpoints take ?limit= (default 100, max 1000) and ?cursor= (the
+next_cursor of the previous page).
+
+Usage:
+    python ratings_api.py --port 8502
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import ratings_store
+from player_index import PlayerIndex
+from ratings_cache import RatingsCache
+from ratings_repo import has_repo
+from ratings_schema import FORMATS
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Seconds between checks of the store for new ratings
+REFRESH_INTERVAL = 5.0
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 512
+RESPONSE_CACHE_SIZE = 512
+
+# Sort order, and so cursor key, of each list endpoint
+ROSTER_KEY = ['Name', 'UAID']
+SNAPSHOT_KEY = ['UAID', 'Format']
+LEADERBOARD_KEY = ['Rating', 'UAID', 'Format']
+HISTORY_KEY = ['Format', 'Date']
+
+_HISTORY_PATH = re.compile(r"/players/(\d+)/history/?$")
+
+
+class ApiError(Exception):
+    """A request the API can't answer; becomes a JSON error response."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df):
+    """JSON-ready rows: ISO dates, ratings to two decimals, NaN as null."""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d")
+        elif isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+        elif pd.api.types.is_float_dtype(df[column]):
+            df[column] = df[column].astype('float64').round(2)
+    return df.astype(object).where(df.notna(), None)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError(400, "invalid cursor")
+
+
+def _same_kind(value, column):
+    """True if a decoded cursor value compares like the column's values (numbers with numbers, strings with strings)."""
+    sample = column.dropna()
+    if sample.empty:
+        return True
+    sample = sample.iloc[0]
+    if isinstance(sample, str):
+        return isinstance(value, str)
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def page(df, key, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One page of a frame sorted by key columns.
+
+    Args:
+        df: JSON-ready rows, sorted by key
+        key: Sort columns; the cursor holds their values for the last row served
+        cursor: next_cursor from the previous page, or None for the first
+        limit: Rows per page
+
+    Returns:
+        tuple: (rows as dicts, next_cursor or None on the last page)
+    """
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if (not isinstance(after, list) or len(after) != len(key)
+                or not all(_same_kind(value, df[column]) for column, value in zip(key, after))):
+            raise ApiError(400, "invalid cursor")
+        # Rows whose key sorts after the cursor's, compared column by column
+        mask = pd.Series(False, index=df.index)
+        equal = pd.Series(True, index=df.index)
+        for column, value in zip(key, after):
+            mask |= equal & (df[column] > value)
+            equal &= df[column] == value
+        df = df[mask]
+    rows = df.head(limit)
+    more = len(df) > limit
+    next_cursor = encode_cursor([rows.iloc[-1][column] for column in key]) if more else None
+    return rows.to_dict('records'), next_cursor
+
+
+class RatingsAPI:
+    """
+    Data behind the API: the ratings cache plus per-version derived tables.
+
+    The store is checked for changes at most every refresh_interval seconds;
+    tables are rebuilt only when the data version changes and swapped in whole,
+    so request threads never see a half-built state.
+    """
+
+    def __init__(self, cache=None, refresh_interval=REFRESH_INTERVAL, profiles_csv=ratings_store.PROFILES_CSV):
+        self.cache = cache or RatingsCache()
+        self.refresh_interval = refresh_interval
+        self.profiles_csv = profiles_csv
+        self._state = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._responses = OrderedDict()
+
+    def state(self):
+        """Current tables, refreshing them if the store changed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state is None or now - self._checked >= self.refresh_interval:
+                self._checked = now
+                self.cache.refresh()
+                profiles_id = ratings_store._identity(self.profiles_csv)
+                version = hashlib.sha1(f"{self.cache.version}|{profiles_id}".encode()).hexdigest()[:16]
+                if self._state is None or self._state['version'] != version:
+                    self._state = self._build(version)
+                    self._responses.clear()
+            return self._state
+
+    def _build(self, version):
+        ratings = self.cache.frame
+        profiles = ratings_store.load_profiles(self.profiles_csv)
+        # Same snapshot source as the app's Statistics tab
+        snapshot = ratings_store.load_latest_snapshot() if has_repo() else self.cache.snapshot()
+        cohorts = profiles.drop_duplicates('UAID', keep='last').set_index('UAID')['NTRP_2026']
+
+        snapshot = _records(snapshot.assign(NTRP_2026=snapshot['UAID'].map(cohorts)))
+        roster = _records(profiles[['Name', 'UAID', 'NTRP_2026', 'WTN_Profile']])
+        return {
+            'version': version,
+            'latest_date': ratings['Date'].max().strftime("%Y-%m-%d") if not ratings.empty else None,
+            'players': PlayerIndex(ratings),
+            'roster': roster.sort_values(ROSTER_KEY, kind='stable').reset_index(drop=True),
+            'snapshot': snapshot.sort_values(SNAPSHOT_KEY, kind='stable').reset_index(drop=True),
+            'leaderboard': snapshot.sort_values(LEADERBOARD_KEY, kind='stable').reset_index(drop=True),
+        }
+
+    def cached_response(self, key, build):
+        """Encoded body for a request key, built once per data version."""
+        with self._lock:
+            if key in self._responses:
+                self._responses.move_to_end(key)
+                return self._responses[key]
+        body = build()
+        with self._lock:
+            self._responses[key] = body
+            if len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return body
+
+    # Endpoints: each returns a JSON-serializable dict
+
+    def index(self, state, query):
+        return {
+            'version': state['version'],
+            'latest_date': state['latest_date'],
+            'players': len(state['players']),
+            'endpoints': ['/roster', '/snapshot', '/leaderboard', '/players/<uaid>/history'],
+        }
+
+    def roster(self, state, query):
+        return self._page(state['roster'], ROSTER_KEY, query)
+
+    def snapshot(self, state, query):
+        df = state['snapshot']
+        formats = _formats(query)
+        if formats is not None:
+            df = df[df['Format'].isin(formats)]
+        return self._page(df, SNAPSHOT_KEY, query)
+
+    def leaderboard(self, state, query):
+        df = state['leaderboard']
+        formats = _formats(query)
+        if formats is not None:
+            df = df[df['Format'].isin(formats)]
+        if 'ntrp' in query:
+            df = df[df['NTRP_2026'].isin(query['ntrp'])]
+        return self._page(df, LEADERBOARD_KEY, query)
+
+    def history(self, state, query, uaid):
+        players = state['players']
+        if uaid not in players:
+            raise ApiError(404, f"no ratings for player {uaid}")
+        formats = _formats(query) or list(FORMATS)
+        df = pd.concat([players.series(uaid, format_name) for format_name in sorted(set(formats))])
+        df = _records(df[['UAID', 'Name', 'Date', 'Format', 'Rating', 'Confidence']])
+        result = self._page(df, HISTORY_KEY, query)
+        result['name'] = players.name(uaid)
+        return result
+
+    @staticmethod
+    def _page(df, key, query):
+        rows, next_cursor = page(df, key, query.get('cursor', [None])[0], _limit(query))
+        return {'data': rows, 'next_cursor': next_cursor}
+
+    def route(self, path):
+        """Endpoint for a path, with its extra arguments."""
+        path = path.rstrip("/") or "/"
+        routes = {'/': self.index, '/roster': self.roster, '/snapshot': self.snapshot,
+                  '/leaderboard': self.leaderboard}
+        if path in routes:
+            return routes[path], ()
+        match = _HISTORY_PATH.match(path)
+        if match:
+            return self.history, (int(match.group(1)),)
+        raise ApiError(404, f"unknown endpoint {path}")
+
+
+def _formats(query):
+    if 'format' not in query:
+        return None
+    formats = [value.capitalize() for value in query['format']]
+    unknown = [value for value in formats if value not in FORMATS]
+    if unknown:
+        raise ApiError(400, f"unknown format {unknown[0]!r}; use one of {', '.join(FORMATS)}")
+    return formats
+
+
+def _limit(query):
+    try:
+        limit = int(query.get('limit', [DEFAULT_LIMIT])[0])
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(400, f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def etag_matches(header, etag):
+    """True if an If-None-Match header matches the ETag (weak comparison)."""
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def make_handler(api, quiet=False):
+    class RatingsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+        def _send(self, status, body=b"", headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _error(self, status, message):
+            body = json.dumps({'error': message}).encode()
+            self._send(status, body, [("Content-Type", "application/json; charset=utf-8")])
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            accepts_gzip = "gzip" in (self.headers.get("Accept-Encoding") or "")
+            try:
+                endpoint, args = api.route(url.path)
+                state = api.state()
+                # One tag per resource, data version and encoding
+                tag = hashlib.sha1(f"{state['version']}|{url.path}?{url.query}".encode()).hexdigest()[:20]
+                compress = accepts_gzip
+                etag = f'"{tag}{"-gz" if compress else ""}"'
+                headers = [("ETag", etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+                if etag_matches(self.headers.get("If-None-Match"), etag):
+                    self._send(304, headers=headers)
+                    return
+
+                def build():
+                    result = endpoint(state, query, *args)
+                    result.setdefault('version', state['version'])
+                    body = json.dumps(result, separators=(",", ":")).encode()
+                    if compress and len(body) >= GZIP_MIN_BYTES:
+                        return gzip.compress(body, mtime=0), True
+                    return body, False
+
+                body, gzipped = api.cached_response((state['version'], url.path, url.query, compress), build)
+            except ApiError as e:
+                self._error(e.status, str(e))
+                return
+            headers.append(("Content-Type", "application/json; charset=utf-8"))
+            if gzipped:
+                headers.append(("Content-Encoding", "gzip"))
+            self._send(200, body, headers)
+
+        do_HEAD = do_GET
+
+    return RatingsHandler
+
+
+def start_server(api, host="127.0.0.1", port=0, quiet=True):
+    """Start the API in a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(api, quiet))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the WTN ratings as a read-only JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--refresh-interval", type=float, default=REFRESH_INTERVAL,
+                        help=f"Seconds between checks of the store for new ratings (default: {REFRESH_INTERVAL:g})")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request")
+    args = parser.parse_args(argv)
+
+    api = RatingsAPI(refresh_interval=args.refresh_interval)
+    state = api.state()
+    print(f"Loaded ratings version {state['version']} ({len(state['players'])} players, "
+          f"latest {state['latest_date']})")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(api, args.quiet))
+    server.daemon_threads = True
+    print(f"Serving the ratings API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
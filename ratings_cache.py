@@ -0,0 +1,226 @@
+"""
+File-version-aware ratings cache for the dashboard.
+Keeps the typed ratings frame in memory, keyed on the identity of the store it was
+read from (mtime, size and content hash). When the store grows it parses and
+type-converts only the rows added since the last load; when nothing changed it
+doesn't touch the frame at all, so derived indexes keyed on `version` stay valid.
+"""
+
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+import ratings_schema
+import ratings_store
+from ratings_repo import DB_PATH, has_repo
+
+
+# Bytes before the previous end of the CSV that must be unchanged for a load to
+# count as a pure append
+TAIL_WINDOW = 64 * 1024
+
+
+def _read_span(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+class RatingsCache:
+    """
+    In-memory ratings (Low confidence excluded, compact ratings_schema layout) refreshed incrementally from the store.
+
+    Attributes:
+        frame: Typed ratings DataFrame
+        version: Content token; changes only when the ratings actually change
+        report_memory: Print the frame's memory footprint after each full load (off by
+            default: the deep measurement costs a sizable share of the load)
+    """
+
+    def __init__(self, csv_path=ratings_store.RATINGS_CSV, parquet_dir=ratings_store.PARQUET_DIR,
+                 db_path=DB_PATH, report_memory=False):
+        self.csv_path = csv_path
+        self.parquet_dir = parquet_dir
+        self.db_path = db_path
+        self.report_memory = report_memory
+        self.frame = None
+        self.version = None
+        self._source = None
+        self._state = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _current_source(self):
+        if ratings_store.has_parquet(self.parquet_dir):
+            return 'parquet'
+        if has_repo(self.db_path):
+            return 'sqlite'
+        return 'csv'
+
+    def refresh(self):
+        """
+        Bring the frame up to date with the store.
+
+        Returns:
+            bool: True if the ratings changed
+        """
+        with self._lock:
+            source = self._current_source()
+            if source != self._source or self.frame is None:
+                self._source = source
+                self._full_load()
+                return True
+            return getattr(self, f'_refresh_{source}')()
+
+    def _set(self, frame, version, appended=None):
+        """Install a new frame; appended rows let the snapshot update incrementally."""
+        if appended is not None and self._snapshot is not None:
+            self._snapshot = ratings_store.update_snapshot(self._snapshot, appended)
+        else:
+            self._snapshot = None
+        self.frame = frame
+        self.version = version
+
+    def _full_load(self):
+        getattr(self, f'_load_{self._source}')()
+        if self.report_memory:
+            ratings_schema.memory_report(self.frame, f"Ratings cache ({self._source})")
+
+    def _typed(self, raw):
+        return ratings_store.filter_ratings(ratings_schema.compact(ratings_store.normalize_ratings(raw, self.csv_path)))
+
+    # CSV: parse only the bytes appended since the last load
+
+    def _load_csv(self):
+        with open(self.csv_path, 'rb') as f:
+            content = f.read()
+        end = len(content)
+        digest = hashlib.sha1(content)
+        raw = pd.read_csv(io.BytesIO(content), encoding='utf-8-sig')
+        stat = os.stat(self.csv_path)
+        self._state = {
+            'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'consumed': end,
+            'digest': digest, 'columns': list(raw.columns),
+            'window': hashlib.sha1(content[max(0, end - TAIL_WINDOW):end]).hexdigest(),
+        }
+        self._set(self._typed(raw), f"csv:{digest.hexdigest()}")
+
+    def _refresh_csv(self):
+        stat = os.stat(self.csv_path)
+        state = self._state
+        if stat.st_mtime_ns == state['mtime'] and stat.st_size == state['size']:
+            return False
+
+        consumed = state['consumed']
+        if stat.st_size >= consumed:
+            window = _read_span(self.csv_path, max(0, consumed - TAIL_WINDOW), consumed)
+            if hashlib.sha1(window).hexdigest() == state['window']:
+                tail = _read_span(self.csv_path, consumed, stat.st_size)
+                end = tail.rfind(b"\n") + 1
+                tail = tail[:end]
+                state['mtime'], state['size'] = stat.st_mtime_ns, stat.st_size
+                if not tail.strip():
+                    # Touched or a partial line only: same content
+                    return False
+                state['digest'].update(tail)
+                state['consumed'] = consumed + end
+                state['window'] = hashlib.sha1(
+                    _read_span(self.csv_path, max(0, state['consumed'] - TAIL_WINDOW), state['consumed'])
+                ).hexdigest()
+                added = pd.read_csv(io.BytesIO(tail), header=None, names=state['columns'])
+                added = self._typed(added)
+                self._set(ratings_schema.concat([self.frame, added]),
+                          f"csv:{state['digest'].hexdigest()}", appended=added)
+                return True
+
+        # Rewritten in place (e.g. by the cleaner): reload only if the content differs
+        previous = self.version
+        self._load_csv()
+        return self.version != previous
+
+    # Parquet: read only part files that weren't there before
+
+    def _parquet_files(self):
+        files = {}
+        for root, _, names in os.walk(self.parquet_dir):
+            for name in names:
+                if name.endswith(".parquet"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    @staticmethod
+    def _parquet_version(files):
+        return "parquet:" + hashlib.sha1(repr(sorted(files.items())).encode()).hexdigest()
+
+    def _read_parquet_files(self, paths):
+        dataset = ds.dataset(
+            sorted(paths), format="parquet", schema=ratings_store.RATINGS_SCHEMA,
+            partitioning=ratings_store.PARTITIONING, partition_base_dir=self.parquet_dir,
+        )
+        return ratings_schema.compact(dataset.to_table(filter=ratings_store._filter()).to_pandas())
+
+    def _load_parquet(self):
+        files = self._parquet_files()
+        self._state = files
+        self._set(self._read_parquet_files(files), self._parquet_version(files))
+
+    def _refresh_parquet(self):
+        files = self._parquet_files()
+        if files == self._state:
+            return False
+        unchanged = all(files.get(path) == ident for path, ident in self._state.items())
+        if not unchanged:
+            self._load_parquet()
+            return True
+        new_paths = [path for path in files if path not in self._state]
+        added = self._read_parquet_files(new_paths)
+        self._state = files
+        self._set(ratings_schema.concat([self.frame, added]), self._parquet_version(files), appended=added)
+        return True
+
+    # SQLite: read only rows above the last rowid, unless a stored row was rewritten
+
+    def _sqlite_identity(self):
+        return ratings_store._identity(self.db_path), ratings_store._identity(self.db_path + "-wal")
+
+    def _read_sqlite(self, after, upto):
+        raw = ratings_store.open_repo(self.db_path).read(rowids=(after, upto))
+        return ratings_schema.load_compact(raw, self.db_path)[0]
+
+    def _load_sqlite(self):
+        identity = self._sqlite_identity()
+        rowid, rewrites = ratings_store.open_repo(self.db_path).watermark()
+        self._state = {'identity': identity, 'rowid': rowid, 'rewrites': rewrites}
+        version = "sqlite:" + hashlib.sha1(repr(self._state).encode()).hexdigest()
+        self._set(self._read_sqlite(0, rowid), version)
+
+    def _refresh_sqlite(self):
+        state = self._state
+        identity = self._sqlite_identity()
+        if identity == state['identity']:
+            return False
+        state['identity'] = identity
+        rowid, rewrites = ratings_store.open_repo(self.db_path).watermark()
+        if rewrites != state['rewrites'] or rowid < state['rowid']:
+            self._load_sqlite()
+            return True
+        if rowid == state['rowid']:
+            return False
+        added = self._read_sqlite(state['rowid'], rowid)
+        state['rowid'] = rowid
+        version = "sqlite:" + hashlib.sha1(f"{self.version}:{rowid}".encode()).hexdigest()
+        self._set(ratings_schema.concat([self.frame, added]), version, appended=added)
+        return True
+
+    def snapshot(self):
+        """Latest rating per (UAID, Format), built once and then updated incrementally."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = ratings_store.build_snapshot(self.frame)
+            return self._snapshot
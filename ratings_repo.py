@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed ratings repository.
+A unique index on (UAID, Format, Date) keeps the store duplicate-free: writes are
+batched upserts, and per-player and latest-snapshot queries are index lookups
+instead of full-file scans.
+
+Usage:
+    python ratings_repo.py import       # load data/wtn_ratings.csv into the database
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+import ratings_schema
+
+
+DB_PATH = "data/wtn_ratings.sqlite"
+RATINGS_CSV = "data/wtn_ratings.csv"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratings (
+    uaid       INTEGER NOT NULL,
+    name       TEXT    NOT NULL,
+    date       TEXT    NOT NULL,   -- YYYY-MM-DD
+    format     TEXT    NOT NULL,
+    rating     REAL,
+    confidence TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ratings_key ON ratings (uaid, format, date);
+CREATE INDEX IF NOT EXISTS ratings_format_date ON ratings (format, date);
+CREATE INDEX IF NOT EXISTS ratings_name ON ratings (name);
+
+-- Materialized latest non-Low rating per (UAID, Format), with the previous value
+CREATE TABLE IF NOT EXISTS latest_ratings (
+    uaid        INTEGER NOT NULL,
+    format      TEXT    NOT NULL,
+    name        TEXT    NOT NULL,
+    date        TEXT    NOT NULL,
+    rating      REAL,
+    confidence  TEXT,
+    prev_date   TEXT,
+    prev_rating REAL,
+    PRIMARY KEY (uaid, format)
+);
+
+-- Bumped whenever a stored rating is updated or deleted. While it holds still the table
+-- only grows, and rows with a rowid above a reader's last one are exactly the new ones
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('rewrites', 0);
+CREATE TRIGGER IF NOT EXISTS ratings_updated AFTER UPDATE ON ratings
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'rewrites'; END;
+CREATE TRIGGER IF NOT EXISTS ratings_deleted AFTER DELETE ON ratings
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'rewrites'; END;
+"""
+
+NOT_LOW = "(confidence IS NULL OR confidence != 'Low')"
+
+# Recompute one (uaid, format) snapshot row from its two latest ratings
+REFRESH_LATEST = f"""
+INSERT OR REPLACE INTO latest_ratings
+SELECT r.uaid, r.format, r.name, r.date, r.rating, r.confidence, p.date, p.rating
+FROM (
+    SELECT * FROM ratings WHERE uaid = :uaid AND format = :format AND {NOT_LOW}
+    ORDER BY date DESC LIMIT 1
+) r
+LEFT JOIN (
+    SELECT * FROM ratings WHERE uaid = :uaid AND format = :format AND {NOT_LOW}
+    ORDER BY date DESC LIMIT 1 OFFSET 1
+) p ON 1 = 1
+"""
+
+UPSERT = """
+INSERT INTO ratings (uaid, name, date, format, rating, confidence)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (uaid, format, date) DO UPDATE SET
+    name = excluded.name,
+    rating = excluded.rating,
+    confidence = excluded.confidence
+"""
+
+# Map between the CSV column names and the table's
+COLUMNS = {'UAID': 'uaid', 'Name': 'name', 'Date': 'date', 'Format': 'format',
+           'Rating': 'rating', 'Confidence': 'confidence',
+           'Prev_Date': 'prev_date', 'Prev_Rating': 'prev_rating'}
+RATINGS_COLUMNS = ['UAID', 'Name', 'Date', 'Format', 'Rating', 'Confidence']
+
+
+def has_repo(path=DB_PATH):
+    """True if the SQLite database has been created."""
+    return os.path.exists(path)
+
+
+def _validated(df, source):
+    """Rows of a ratings frame that fit ratings_schema; the rest are reported and left out."""
+    valid, rejected = ratings_schema.validate_ratings(df)
+    ratings_schema.report_rejected(rejected, source)
+    return valid
+
+
+def _rows(df):
+    """Turn validated ratings rows into upsert parameter tuples."""
+    dates = df['Date'].dt.strftime("%Y-%m-%d")
+    return [
+        (int(uaid), name, date, fmt, float(rating), None if pd.isna(confidence) else confidence)
+        for uaid, name, date, fmt, rating, confidence in zip(
+            df['UAID'], df['Name'], dates, df['Format'], df['Rating'], df['Confidence'])
+    ]
+
+
+class RatingsRepository:
+    """
+    Ratings stored in a local SQLite file.
+
+    One connection is shared across threads (Streamlit sessions, scraper workers)
+    behind a lock.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+        # Databases created before the snapshot table existed need it filled once
+        if self._scalar("SELECT COUNT(*) FROM latest_ratings") == 0 and self.count() > 0:
+            with self._lock, self._conn:
+                self._refresh_latest(self._conn.execute("SELECT DISTINCT uaid, format FROM ratings").fetchall())
+
+    def close(self):
+        self._conn.close()
+
+    def upsert(self, records, batch_size=500, source="ratings"):
+        """
+        Insert or update ratings keyed on (UAID, Format, Date).
+
+        Rows that don't fit ratings_schema are reported and not written.
+
+        Args:
+            records: Rating records (dicts with the wtn_ratings.csv columns) or a DataFrame
+            batch_size: Rows per executemany batch
+            source: Where the records came from, for the rejected-rows report
+
+        Returns:
+            int: Number of rows written
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        if df.empty:
+            return 0
+        rows = _rows(_validated(df, source))
+        with self._lock, self._conn:
+            for start in range(0, len(rows), batch_size):
+                self._conn.executemany(UPSERT, rows[start:start + batch_size])
+            self._refresh_latest({(row[0], row[3]) for row in rows})
+        return len(rows)
+
+    def _refresh_latest(self, keys):
+        """Update the snapshot rows for the given (uaid, format) keys. Caller holds the lock."""
+        keys = list(keys)
+        self._conn.executemany(
+            "DELETE FROM latest_ratings WHERE uaid = ? AND format = ?", keys)
+        self._conn.executemany(
+            REFRESH_LATEST, [{'uaid': uaid, 'format': fmt} for uaid, fmt in keys])
+
+    def replace_all(self, records, batch_size=500, source="ratings"):
+        """
+        Replace the repository's contents with records in a single transaction.
+        Rows that don't fit ratings_schema are reported and not written.
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        rows = _rows(_validated(df, source)) if not df.empty else []
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ratings")
+            self._conn.execute("DELETE FROM latest_ratings")
+            for start in range(0, len(rows), batch_size):
+                self._conn.executemany(UPSERT, rows[start:start + batch_size])
+            self._refresh_latest({(row[0], row[3]) for row in rows})
+        return len(rows)
+
+    def existing_keys(self, df):
+        """
+        Flag rows of a ratings frame whose (UAID, Format, Date) is already stored.
+        Rows that don't fit ratings_schema are never flagged.
+
+        Returns:
+            Series: Boolean mask aligned with df
+        """
+        valid, _ = ratings_schema.validate_ratings(df)
+        if valid.empty:
+            return pd.Series(False, index=df.index)
+        keys = [(uaid, fmt, date) for uaid, _, date, fmt, _, _ in _rows(valid)]
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS probe (uaid INTEGER, format TEXT, date TEXT)")
+            cursor.execute("DELETE FROM probe")
+            cursor.executemany("INSERT INTO probe VALUES (?, ?, ?)", keys)
+            found = set(cursor.execute(
+                "SELECT p.uaid, p.format, p.date FROM probe p "
+                "JOIN ratings r ON r.uaid = p.uaid AND r.format = p.format AND r.date = p.date"
+            ).fetchall())
+        return pd.Series([key in found for key in keys], index=valid.index).reindex(df.index, fill_value=False)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        df = df.rename(columns={v: k for k, v in COLUMNS.items()})
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def read(self, columns=None, formats=None, start=None, end=None, dates=None, exclude_low=True,
+             rowids=None):
+        """
+        Read ratings with the same arguments as ratings_store.read_parquet.
+
+        Args:
+            rowids: Only rows with after < rowid <= upto, as an (after, upto) pair
+        """
+        select = ", ".join(COLUMNS[c] for c in (columns or RATINGS_COLUMNS))
+        where, params = [], []
+        if rowids is not None:
+            where.append("rowid > ? AND rowid <= ?")
+            params.extend(rowids)
+        if formats is not None:
+            where.append(f"format IN ({', '.join('?' * len(formats))})")
+            params.extend(formats)
+        if start is not None:
+            where.append("date >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("date <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        if dates is not None:
+            where.append(f"date IN ({', '.join('?' * len(dates))})")
+            params.extend(pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates)
+        if exclude_low:
+            where.append("(confidence IS NULL OR confidence != 'Low')")
+        sql = f"SELECT {select} FROM ratings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._query(sql, params)
+
+    def latest_snapshot(self, formats=None):
+        """
+        Latest non-Low rating for each (UAID, Format) from the materialized table,
+        with Prev_Date/Prev_Rating holding the rating before it.
+        """
+        sql = "SELECT * FROM latest_ratings"
+        params = []
+        if formats is not None:
+            sql += f" WHERE format IN ({', '.join('?' * len(formats))})"
+            params.extend(formats)
+        df = self._query(sql, params)
+        df['Prev_Date'] = pd.to_datetime(df['Prev_Date'])
+        return df
+
+    def _scalar(self, sql):
+        with self._lock:
+            return self._conn.execute(sql).fetchone()[0]
+
+    def watermark(self):
+        """
+        (Highest rowid, rewrite counter) of the ratings table. Between two watermarks
+        with the same counter, the rows added are those with a rowid in between.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT (SELECT COALESCE(MAX(rowid), 0) FROM ratings), "
+                "(SELECT value FROM meta WHERE key = 'rewrites')"
+            ).fetchone()
+
+    def count(self):
+        return self._scalar("SELECT COUNT(*) FROM ratings")
+
+
+def import_csv(csv_path=RATINGS_CSV, path=DB_PATH):
+    """
+    Load a ratings CSV into the repository. Rows sharing (UAID, Format, Date) collapse
+    into one, the later row in the file winning; rows that don't fit ratings_schema
+    are reported and skipped.
+
+    Returns:
+        RatingsRepository: The populated repository
+    """
+    repo = RatingsRepository(path)
+    repo.upsert(pd.read_csv(csv_path, encoding='utf-8-sig'), source=csv_path)
+    return repo
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        print(__doc__)
+        sys.exit(1)
+    print(f"Importing {RATINGS_CSV} into {DB_PATH}...")
+    repo = import_csv()
+    print(f"Repository holds {repo.count()} ratings")
+    repo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Shared schema for ratings frames.
+Validates raw ratings rows once, reporting the ones that don't fit instead of
+silently coercing them to NaN, and converts valid rows to a compact in-memory
+layout: categorical Name/Format/Confidence, float32 ratings, int64 UAID and
+normalized datetime64 dates. Equality filters on the categorical columns compare
+integer codes rather than strings.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+FORMATS = ['Doubles', 'Singles']
+CONFIDENCE_LEVELS = ['High', 'Medium', 'Low', 'Unknown']
+FORMAT_DTYPE = pd.CategoricalDtype(FORMATS)
+CONFIDENCE_DTYPE = pd.CategoricalDtype(CONFIDENCE_LEVELS)
+
+# WTN runs from 1 (best) to 40
+RATING_RANGE = (1.0, 40.0)
+
+
+def validate_ratings(raw):
+    """
+    Type a raw ratings frame, separating rows that don't fit the schema.
+
+    Args:
+        raw: Frame with the wtn_ratings.csv columns, as read from CSV or records
+
+    Returns:
+        tuple: (valid rows with int64 UAID, float64 Rating and normalized datetime64
+                Date, rejected raw rows with a Reason column)
+    """
+    df = raw.copy()
+    uaid = pd.to_numeric(df['UAID'], errors='coerce')
+    dates = pd.to_datetime(df['Date'], format='mixed', errors='coerce').dt.normalize()
+    rating = pd.to_numeric(df['Rating'], errors='coerce')
+    confidence = df['Confidence'].astype(object).where(df['Confidence'].notna(), None)
+    # Names repeat on every rating date, so blank-checking the distinct ones is enough
+    blank_names = [name for name in pd.unique(df['Name'].dropna()) if not str(name).strip()]
+
+    # First failing check per row, in this order
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    checks = [
+        (uaid.isna() | (uaid % 1 != 0), "bad UAID"),
+        (df['Name'].isna() | df['Name'].isin(blank_names), "missing name"),
+        (dates.isna(), "bad date"),
+        (~df['Format'].isin(FORMATS), "unknown format"),
+        (rating.isna(), "bad rating"),
+        (~rating.between(*RATING_RANGE) & rating.notna(), "rating out of range"),
+        (confidence.notna() & ~confidence.isin(CONFIDENCE_LEVELS), "unknown confidence"),
+    ]
+    for failed, reason in checks:
+        reasons = reasons.where(reasons.notna() | ~failed, reason)
+
+    bad = reasons.notna()
+    rejected = raw[bad].assign(Reason=reasons[bad])
+    valid = df[~bad].assign(
+        UAID=uaid[~bad].astype('int64'),
+        Date=dates[~bad],
+        Rating=rating[~bad].astype('float64'),
+    )
+    return valid, rejected
+
+
+def report_rejected(rejected, source="ratings", limit=5):
+    """Print a summary of rows validate_ratings rejected."""
+    if rejected.empty:
+        return
+    counts = ", ".join(f"{reason} {n}" for reason, n in rejected['Reason'].value_counts().items())
+    print(f"Rejected {len(rejected)} rows from {source}: {counts}")
+    print(rejected.head(limit).to_string())
+
+
+def compact(df):
+    """
+    Convert a typed ratings frame (or snapshot) to the compact in-memory layout.
+
+    Name categories are kept sorted so sorting by Name stays alphabetical.
+    """
+    df = df.copy()
+    if 'Name' in df.columns:
+        df['Name'] = pd.Categorical(df['Name'].astype(object), categories=sorted(df['Name'].dropna().unique()))
+    if 'Format' in df.columns:
+        df['Format'] = df['Format'].astype(object).astype(FORMAT_DTYPE)
+    if 'Confidence' in df.columns:
+        df['Confidence'] = df['Confidence'].astype(object).astype(CONFIDENCE_DTYPE)
+    for column in ('Rating', 'Prev_Rating'):
+        if column in df.columns:
+            df[column] = df[column].astype('float32')
+    if 'UAID' in df.columns:
+        df['UAID'] = df['UAID'].astype('int64')
+    for column in ('Date', 'Prev_Date'):
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column]).astype('datetime64[ns]')
+    return df
+
+
+def load_compact(raw, source="ratings"):
+    """Validate a raw ratings frame, report rejected rows and return the compact valid rows."""
+    valid, rejected = validate_ratings(raw)
+    report_rejected(rejected, source)
+    return compact(valid), rejected
+
+
+def concat(frames):
+    """
+    Concatenate compact frames, keeping Name categorical.
+
+    pandas falls back to object when categories differ, so the Name categories are
+    unioned (and kept sorted) explicitly.
+    """
+    frames = [frame for frame in frames if frame is not None]
+    result = pd.concat(frames, ignore_index=True)
+    if 'Name' in result.columns and all(isinstance(f['Name'].dtype, pd.CategoricalDtype) for f in frames):
+        result['Name'] = union_categoricals([f['Name'] for f in frames], sort_categories=True)
+    return result
+
+
+def isin(series, values):
+    """series.isin(values), comparing integer codes when the series is categorical."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        codes = [categories.get_loc(value) for value in values if value in categories]
+        return pd.Series(np.isin(series.cat.codes.to_numpy(), codes), index=series.index)
+    return series.isin(list(values))
+
+
+def not_equal(series, value):
+    """series != value, comparing integer codes when the series is categorical (nulls count as different)."""
+    return ~isin(series, [value])
+
+
+def memory_report(df, label="ratings"):
+    """
+    Print the frame's deep memory use per column and in total, next to what the
+    same rows take with object strings and float64 ratings.
+
+    Returns:
+        int: Bytes used by the frame
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    wide = df.astype({column: object if isinstance(dtype, pd.CategoricalDtype) else 'float64'
+                      for column, dtype in df.dtypes.items()
+                      if isinstance(dtype, pd.CategoricalDtype) or dtype == 'float32'})
+    total, wide_total = usage.sum(), wide.memory_usage(deep=True, index=False).sum()
+    columns = ", ".join(f"{column} {bytes_ / 1e3:.1f}" for column, bytes_ in usage.items())
+    print(f"{label}: {len(df)} rows, {total / 1e3:.1f} KB ({columns} KB), "
+          f"{wide_total / 1e3:.1f} KB with object columns")
+    return total
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Columnar ratings store.
+Keeps ratings as typed Parquet partitioned by date, with dates normalized once at
+ingest, so readers can load only the columns, formats and dates they need.
+The CSV stays the canonical, human-editable copy; the Parquet dataset mirrors it.
+
+Usage:
+    python ratings_store.py migrate     # one-shot build from data/wtn_ratings.csv
+"""
+
+import functools
+import os
+import shutil
+import sys
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+import ratings_schema
+from ratings_repo import DB_PATH, RatingsRepository, has_repo
+
+
+RATINGS_CSV = "data/wtn_ratings.csv"
+PROFILES_CSV = "data/wtn_profile_links.csv"
+PARQUET_DIR = "data/wtn_ratings_parquet"
+
+RATINGS_SCHEMA = pa.schema([
+    ('Name', pa.string()),
+    ('UAID', pa.int64()),
+    ('Format', pa.string()),
+    ('Rating', pa.float64()),
+    ('Confidence', pa.string()),
+    ('Date', pa.date32()),
+])
+PARTITIONING = ds.partitioning(pa.schema([('Date', pa.date32())]), flavor="hive")
+
+
+def normalize_ratings(df, source="ratings"):
+    """
+    Type a raw ratings frame: parse mixed-format dates and numeric ratings once.
+
+    Rows that don't fit ratings_schema are reported and left out rather than
+    coerced to NaN. Ratings stay float64 here so the stores keep exact values;
+    readers convert to the compact layout with ratings_schema.compact.
+    """
+    valid, rejected = ratings_schema.validate_ratings(df)
+    ratings_schema.report_rejected(rejected, source)
+    return valid
+
+
+def _to_table(df):
+    df = df[RATINGS_SCHEMA.names].copy()
+    df['Date'] = df['Date'].dt.date
+    # Categoricals are written as plain strings
+    for column in ('Name', 'Format', 'Confidence'):
+        df[column] = df[column].astype(object)
+    return pa.Table.from_pandas(df, schema=RATINGS_SCHEMA, preserve_index=False)
+
+
+def has_parquet(parquet_dir=PARQUET_DIR):
+    """True if the Parquet dataset has been built."""
+    return os.path.isdir(parquet_dir) and any(name.startswith("Date=") for name in os.listdir(parquet_dir))
+
+
+def migrate_csv(csv_path=RATINGS_CSV, parquet_dir=PARQUET_DIR):
+    """
+    Build the Parquet dataset from the ratings CSV, replacing any existing one.
+
+    Returns:
+        int: Number of rows written
+    """
+    df = normalize_ratings(pd.read_csv(csv_path, encoding='utf-8-sig'), csv_path)
+    tmp_dir = parquet_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(_to_table(df), tmp_dir, format="parquet", partitioning=PARTITIONING)
+    shutil.rmtree(parquet_dir, ignore_errors=True)
+    os.replace(tmp_dir, parquet_dir)
+    return len(df)
+
+
+def append_parquet(records, parquet_dir=PARQUET_DIR):
+    """
+    Add new rating records to their date partitions as new part files.
+
+    Args:
+        records: Rating records (dicts with the wtn_ratings.csv columns)
+    """
+    if not records:
+        return 0
+    df = normalize_ratings(pd.DataFrame(records))
+    ds.write_dataset(
+        _to_table(df), parquet_dir, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(df)
+
+
+def _dataset(parquet_dir=PARQUET_DIR):
+    return ds.dataset(parquet_dir, format="parquet", schema=RATINGS_SCHEMA, partitioning=PARTITIONING)
+
+
+def _filter(formats=None, start=None, end=None, exclude_low=True, dates=None):
+    expr = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if formats is not None:
+        expr = both(expr, ds.field('Format').isin(list(formats)))
+    if start is not None:
+        expr = both(expr, ds.field('Date') >= pa.scalar(pd.Timestamp(start).date(), pa.date32()))
+    if end is not None:
+        expr = both(expr, ds.field('Date') <= pa.scalar(pd.Timestamp(end).date(), pa.date32()))
+    if dates is not None:
+        expr = both(expr, ds.field('Date').isin(pa.array([pd.Timestamp(d).date() for d in dates], pa.date32())))
+    if exclude_low:
+        expr = both(expr, (ds.field('Confidence') != 'Low') | ds.field('Confidence').is_null())
+    return expr
+
+
+def partition_dates(parquet_dir=PARQUET_DIR):
+    """Dates with a partition in the dataset, from the directory names alone."""
+    return sorted(
+        pd.Timestamp(name.split("=", 1)[1])
+        for name in os.listdir(parquet_dir) if name.startswith("Date=")
+    )
+
+
+def read_parquet(columns=None, formats=None, start=None, end=None, dates=None, exclude_low=True,
+                 parquet_dir=PARQUET_DIR):
+    """
+    Read ratings from the Parquet dataset with column and filter pushdown.
+
+    Args:
+        columns: Columns to load (default: all)
+        formats: Only these formats, e.g. ['Singles']
+        start, end: Inclusive date range
+        dates: Only these dates
+        exclude_low: Drop Low confidence ratings
+
+    Returns:
+        DataFrame: Ratings in the ratings_schema compact layout
+    """
+    table = _dataset(parquet_dir).to_table(
+        columns=columns,
+        filter=_filter(formats, start, end, exclude_low, dates),
+    )
+    return ratings_schema.compact(table.to_pandas())
+
+
+def filter_ratings(df, columns=None, formats=None, start=None, end=None, dates=None, exclude_low=True):
+    """Apply the read_parquet filters to an in-memory ratings frame."""
+    mask = pd.Series(True, index=df.index)
+    if formats is not None:
+        mask &= ratings_schema.isin(df['Format'], formats)
+    if start is not None:
+        mask &= df['Date'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df['Date'] <= pd.Timestamp(end)
+    if dates is not None:
+        mask &= df['Date'].isin(pd.to_datetime(list(dates)))
+    if exclude_low:
+        mask &= ratings_schema.not_equal(df['Confidence'], 'Low')
+    df = df[mask]
+    return df[list(columns)] if columns is not None else df
+
+
+def read_csv(columns=None, formats=None, start=None, end=None, dates=None, exclude_low=True,
+             csv_path=RATINGS_CSV):
+    """Same as read_parquet, but from the ratings CSV (full scan)."""
+    df = ratings_schema.compact(normalize_ratings(pd.read_csv(csv_path, encoding='utf-8-sig'), csv_path))
+    return filter_ratings(df, columns, formats, start, end, dates, exclude_low)
+
+
+def _identity(path):
+    """(path, mtime, size) of a file, or of a directory tree's files."""
+    if os.path.isdir(path):
+        files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        stats = [os.stat(f) for f in files]
+        return (path, max((s.st_mtime_ns for s in stats), default=0), sum(s.st_size for s in stats), len(stats))
+    if os.path.exists(path):
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    return (path, None)
+
+
+@functools.lru_cache(maxsize=None)
+def open_repo(path=DB_PATH):
+    """Shared RatingsRepository for readers in this process."""
+    return RatingsRepository(path)
+
+
+def read_repo(**filters):
+    """Same as read_parquet, but from the SQLite repository."""
+    return ratings_schema.compact(open_repo().read(**filters))
+
+
+def rebuild_from_csv(csv_path=RATINGS_CSV):
+    """Re-derive the Parquet dataset and SQLite repository after the CSV was rewritten."""
+    if has_parquet():
+        migrate_csv(csv_path)
+    if has_repo():
+        open_repo().replace_all(pd.read_csv(csv_path, encoding='utf-8-sig'), source=csv_path)
+
+
+def load_ratings(columns=None, formats=None, start=None, end=None, dates=None, exclude_low=True):
+    """Load ratings from the Parquet dataset, the SQLite repository or the CSV, whichever exists first."""
+    if has_parquet():
+        reader = read_parquet
+    elif has_repo():
+        reader = read_repo
+    else:
+        reader = read_csv
+    return reader(columns=columns, formats=formats, start=start, end=end, dates=dates, exclude_low=exclude_low)
+
+
+SNAPSHOT_COLUMNS = ['UAID', 'Format', 'Name', 'Date', 'Rating', 'Confidence', 'Prev_Date', 'Prev_Rating']
+
+
+def build_snapshot(ratings):
+    """
+    Latest rating per (UAID, Format) with the previous rating alongside.
+
+    Args:
+        ratings: Ratings frame (Low confidence already excluded)
+
+    Returns:
+        DataFrame: One row per (UAID, Format) with SNAPSHOT_COLUMNS
+    """
+    ordered = ratings.sort_values(['UAID', 'Format', 'Date'])
+    groups = ordered.groupby(['UAID', 'Format'], sort=False, observed=True)
+    ordered = ordered.assign(Prev_Date=groups['Date'].shift(), Prev_Rating=groups['Rating'].shift())
+    latest = ordered.drop_duplicates(['UAID', 'Format'], keep='last')
+    return latest[SNAPSHOT_COLUMNS].reset_index(drop=True)
+
+
+def update_snapshot(snapshot, new_ratings):
+    """
+    Fold newly arrived ratings into a snapshot without touching the full history.
+
+    The two latest dates of a key's combined history are among the two latest of
+    the snapshot row and the two latest of the batch, so only those four candidates
+    are compared; on a shared date the batch's rating replaces the stored one.
+    """
+    if new_ratings.empty:
+        return snapshot
+    keys = ['UAID', 'Format']
+    incoming = build_snapshot(new_ratings)
+    old = snapshot.merge(incoming[keys], on=keys)
+
+    candidates = []
+    for priority, side in enumerate((incoming, old)):
+        latest = side.drop(columns=['Prev_Date', 'Prev_Rating'])
+        prev = side[keys + ['Prev_Date', 'Prev_Rating']].dropna(subset=['Prev_Date'])
+        prev = prev.rename(columns={'Prev_Date': 'Date', 'Prev_Rating': 'Rating'})
+        candidates += [latest.assign(_priority=priority), prev.assign(_priority=priority)]
+    combined = pd.concat(candidates, ignore_index=True).sort_values(keys + ['Date', '_priority'])
+    combined = combined.drop_duplicates(keys + ['Date'], keep='first')
+    changed = ratings_schema.compact(build_snapshot(combined))
+
+    keep = snapshot.merge(incoming[keys], on=keys, how='left', indicator=True)
+    keep = keep[keep['_merge'] == 'left_only'][SNAPSHOT_COLUMNS]
+    return ratings_schema.concat([keep, changed])
+
+
+def load_latest_snapshot(formats=None):
+    """
+    Latest non-Low rating per (UAID, Format).
+
+    Reads the repository's materialized table when it exists; otherwise builds it
+    from the loaded ratings.
+    """
+    if has_repo():
+        return ratings_schema.compact(open_repo().latest_snapshot(formats))
+    snapshot = build_snapshot(load_ratings())
+    if formats is not None:
+        snapshot = snapshot[ratings_schema.isin(snapshot['Format'], formats)]
+    return snapshot
+
+
+def load_profiles(csv_path=PROFILES_CSV):
+    """Load the player profile links."""
+    return pd.read_csv(csv_path, encoding='utf-8-sig')
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print(__doc__)
+        sys.exit(1)
+    print(f"Migrating {RATINGS_CSV} to {PARQUET_DIR}...")
+    rows = migrate_csv()
+    print(f"Wrote {rows} rows in {len(partition_dates())} date partitions")
+
+
+if __name__ == "__main__":
+    main()
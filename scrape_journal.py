@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Append-only journal for scrape results.
+Each scraped profile is written as one fsync'd JSON line, so a crash loses at most
+the profile in flight and a run can be resumed. Compaction folds the journal into
+the main ratings store once the run finishes.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from ratings_schema import report_rejected, validate_ratings
+from scrape_metrics import COMPLETE_OUTCOMES
+
+
+JOURNAL_PATH = "data/scrape_journal.jsonl"
+RATINGS_COLUMNS = ['Name', 'UAID', 'Date', 'Format', 'Rating', 'Confidence']
+
+
+class ScrapeJournal:
+    """
+    Journal of the current (not yet compacted) scrape run.
+
+    Lines look like:
+        {"run": "...", "uaid": 123, "name": "...", "scraped_at": "...", "updated": "...",
+         "outcome": "ok", "records": [...]}
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.run_id = None
+        self._file = None
+
+    def entries(self):
+        """Yield every complete entry in the journal, skipping a torn last line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a partial final line
+                    continue
+
+    def completed_uaids(self):
+        """UAIDs already finished in the journal's run; failed profiles are tried again on resume."""
+        return {int(entry['uaid']) for entry in self.entries()
+                if entry.get('outcome', 'ok') in COMPLETE_OUTCOMES}
+
+    def is_empty(self):
+        return not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+
+    def open(self, resume=False):
+        """
+        Open the journal for appending.
+
+        Args:
+            resume: Continue the run already in the journal instead of starting a new one
+        """
+        if resume:
+            for entry in self.entries():
+                self.run_id = entry['run']
+        if self.run_id is None:
+            self.run_id = uuid.uuid4().hex[:12]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return self
+
+    def append(self, uaid, name, records, updated_date=None, outcome=None):
+        """Durably record the result of one profile."""
+        entry = {
+            'run': self.run_id,
+            'uaid': int(uaid),
+            'name': name,
+            'scraped_at': datetime.now().isoformat(timespec='seconds'),
+            'updated': updated_date,
+            'outcome': outcome or ('ok' if records else 'no_rating'),
+            'records': records,
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def records(self):
+        """All rating records in the journal, in the order they were written."""
+        records = []
+        for entry in self.entries():
+            records.extend(entry['records'])
+        return records
+
+
+def build_records(row, result, scrape_date=None):
+    """
+    Turn a scrape result into ratings rows for the player.
+
+    Args:
+        row: Profile row (dict with Name, UAID)
+        result: Result dict from scrape_wtn_profile
+        scrape_date: Date (YYYY-MM-DD) to use when the profile shows no updated date;
+            defaults to today
+
+    Returns:
+        list: Rating records (dicts with the wtn_ratings.csv columns)
+    """
+    # Use the updated date from the profile if available, otherwise use scrape date
+    scrape_date = scrape_date or datetime.now().strftime("%Y-%m-%d")
+    record_date = result['updated_date'] if result['updated_date'] else scrape_date
+
+    records = []
+    for format_name in ('Doubles', 'Singles'):
+        prefix = format_name.lower()
+        if result[f'{prefix}_rating']:
+            records.append({
+                'Name': row['Name'],
+                'UAID': int(row['UAID']),
+                'Date': record_date,
+                'Format': format_name,
+                'Rating': result[f'{prefix}_rating'],
+                'Confidence': result[f'{prefix}_confidence'] if result[f'{prefix}_confidence'] else 'Unknown'
+            })
+    return records
+
+
+def rating_keys(df):
+    """(UAID, Date, Format) keys for ratings rows, with dates normalized to YYYY-MM-DD."""
+    dates = pd.to_datetime(df['Date'], format='mixed').dt.strftime("%Y-%m-%d")
+    return pd.Series(list(zip(df['UAID'].astype('int64'), dates, df['Format'])), index=df.index)
+
+
+def drop_existing(df, output_csv, repo=None):
+    """
+    Drop rows whose (UAID, Date, Format) is already stored or earlier in the batch.
+
+    With a RatingsRepository the check is an index lookup; otherwise the keys
+    columns of the CSV are scanned.
+    """
+    keys = rating_keys(df)
+    duplicate = keys.duplicated()
+    if repo is not None:
+        duplicate |= repo.existing_keys(df)
+    elif os.path.exists(output_csv) and os.path.getsize(output_csv) > 0:
+        existing = pd.read_csv(output_csv, usecols=['UAID', 'Date', 'Format'], encoding='utf-8-sig')
+        duplicate |= keys.isin(set(rating_keys(existing)))
+    return df[~duplicate], int(duplicate.sum())
+
+
+def append_csv(records, output_csv, repo=None):
+    """
+    Append records to a ratings CSV without rewriting the existing rows.
+
+    Rows that don't fit the ratings schema, and rows whose (UAID, Date, Format)
+    is already stored, are refused.
+
+    Returns:
+        list: The records that were actually appended
+    """
+    if not records:
+        return []
+    df = pd.DataFrame(records, columns=RATINGS_COLUMNS)
+    valid, rejected = validate_ratings(df)
+    report_rejected(rejected, output_csv)
+    df = df.loc[valid.index]
+    if df.empty:
+        return []
+    df, refused = drop_existing(df, output_csv, repo)
+    if refused:
+        print(f"Refused {refused} duplicate (UAID, Date, Format) rows")
+    if df.empty:
+        return []
+    exists = os.path.exists(output_csv) and os.path.getsize(output_csv) > 0
+    if exists:
+        # Make sure we start on a fresh line
+        with open(output_csv, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        if needs_newline:
+            with open(output_csv, 'a', encoding='utf-8') as f:
+                f.write("\n")
+    with open(output_csv, 'a', encoding='utf-8', newline='') as f:
+        df.to_csv(f, header=not exists, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    return df.to_dict('records')
+
+
+def compact_journal(journal, output_csv, repo=None):
+    """
+    Fold the journal into the main ratings CSV and clear it.
+
+    With a RatingsRepository, duplicates are checked against it and the appended
+    rows are upserted into it as well.
+
+    Returns:
+        list: The records that were appended
+    """
+    journal.close()
+    records = append_csv(journal.records(), output_csv, repo)
+    if repo is not None:
+        repo.upsert(records)
+    if os.path.exists(journal.path):
+        os.remove(journal.path)
+    return records
@@ -0,0 +1,278 @@
+"""
+Per-profile timing spans, counters and outcomes for scraper runs.
+Each profile gets a ProfileTrace with the time spent in each phase (pacing,
+navigation, widget wait, settle, parse, persist), counts of timeouts, empty
+results, parse warnings, errors and HTTP-level retries, and an outcome (ok, no rating, timeout, parse
+error, driver crash, server error, error). At the end of a run the traces are written as JSON
+lines and as a Prometheus textfile, and the coverage, slowest profiles and phases
+are printed.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+METRICS_JSONL = "data/scrape_metrics.jsonl"
+METRICS_PROM = "data/scrape_metrics.prom"
+
+PHASES = ('pacing', 'navigation', 'widget_wait', 'settle', 'parse', 'persist')
+COUNTERS = ('timeouts', 'empty_results', 'parse_warnings', 'errors', 'server_errors', 'driver_crashes', 'http_retries')
+
+# How a profile's scrape ended. no_rating means the page loaded but shows no WTN;
+# server_error is a 429/5xx response or a dropped connection, error anything else
+# (e.g. a 404). Only the transient ones are retried after the main pass.
+OUTCOMES = ('ok', 'no_rating', 'timeout', 'parse_error', 'driver_crash', 'server_error', 'error')
+TRANSIENT_OUTCOMES = ('timeout', 'driver_crash', 'server_error')
+COMPLETE_OUTCOMES = ('ok', 'no_rating')
+
+
+def classify_outcome(rated, counters):
+    """
+    Outcome of one scrape attempt.
+
+    Args:
+        rated: Whether the result holds at least one rating
+        counters: The attempt's ProfileTrace counters
+    """
+    if rated:
+        return 'ok'
+    if counters.get('driver_crashes'):
+        return 'driver_crash'
+    if counters.get('timeouts'):
+        return 'timeout'
+    if counters.get('server_errors'):
+        return 'server_error'
+    if counters.get('errors'):
+        return 'error'
+    if counters.get('parse_warnings'):
+        return 'parse_error'
+    return 'no_rating'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class ProfileTrace:
+    """
+    Timing spans and counters for one profile.
+
+    Attributes:
+        spans: Seconds per phase
+        counters: Event counts (timeouts, parse warnings, ...)
+        elapsed: Seconds spent in the backend's scrape call
+        outcome: One of OUTCOMES, for the last attempt
+        attempts: Number of attempts, including retries
+        transfer_bytes: Bytes the browser transferred for the page (Selenium only)
+        js_heap_bytes: JS heap in use after the page loaded (Selenium only)
+    """
+
+    def __init__(self, uaid=None, name=None):
+        self.uaid = uaid
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.spans = {}
+        self.counters = {}
+        self.elapsed = 0.0
+        self.outcome = None
+        self.attempts = 1
+        self.transfer_bytes = 0
+        self.js_heap_bytes = 0
+
+    @contextmanager
+    def span(self, phase):
+        """Time a block and add it to the phase's total."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[phase] = self.spans.get(phase, 0.0) + time.perf_counter() - start
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def absorb(self, earlier):
+        """Fold an earlier attempt's time and counters into this (retry) trace."""
+        for phase, seconds in earlier.spans.items():
+            self.spans[phase] = self.spans.get(phase, 0.0) + seconds
+        for counter, n in earlier.counters.items():
+            self.count(counter, n)
+        self.elapsed += earlier.elapsed
+        self.transfer_bytes += earlier.transfer_bytes
+        self.js_heap_bytes = max(self.js_heap_bytes, earlier.js_heap_bytes)
+        self.started_at = earlier.started_at
+        self.attempts = earlier.attempts + 1
+
+    @property
+    def total(self):
+        return sum(self.spans.values())
+
+    def to_dict(self):
+        return {
+            'uaid': None if self.uaid is None else int(self.uaid),
+            'name': self.name,
+            'started_at': self.started_at,
+            'outcome': self.outcome,
+            'attempts': self.attempts,
+            'elapsed': round(self.elapsed, 4),
+            'total': round(self.total, 4),
+            'spans': {phase: round(seconds, 4) for phase, seconds in self.spans.items()},
+            'counters': dict(self.counters),
+            'transfer_bytes': self.transfer_bytes,
+            'js_heap_bytes': self.js_heap_bytes,
+        }
+
+
+class ScrapeMetrics:
+    """Collects the traces of one scraper run and exports them."""
+
+    def __init__(self):
+        self.run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.traces = []
+        self._started = time.perf_counter()
+        self._start_time = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, trace):
+        with self._lock:
+            self.traces.append(trace)
+
+    def counters(self):
+        """Run totals for every counter, including ones that never fired."""
+        totals = dict.fromkeys(COUNTERS, 0)
+        for trace in self.traces:
+            for counter, n in trace.counters.items():
+                totals[counter] = totals.get(counter, 0) + n
+        return totals
+
+    def outcomes(self):
+        """Number of profiles per outcome, including outcomes that didn't occur."""
+        totals = dict.fromkeys(OUTCOMES, 0)
+        for trace in self.traces:
+            if trace.outcome is not None:
+                totals[trace.outcome] = totals.get(trace.outcome, 0) + 1
+        return totals
+
+    def phase_seconds(self):
+        """Per-phase list of seconds over the profiles that went through the phase."""
+        phases = {phase: [] for phase in PHASES}
+        for trace in self.traces:
+            for phase, seconds in trace.spans.items():
+                phases.setdefault(phase, []).append(seconds)
+        return phases
+
+    def write_jsonl(self, path=METRICS_JSONL):
+        """Write one JSON line per profile, replacing the previous run's file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for trace in self.traces:
+                f.write(json.dumps({'run': self.run_id, **trace.to_dict()}) + "\n")
+        os.replace(tmp_path, path)
+
+    def write_prometheus(self, path=METRICS_PROM):
+        """
+        Write the run's metrics in the Prometheus text format.
+
+        The file is replaced atomically so a node_exporter textfile collector never
+        reads a partial file.
+        """
+        elapsed = [trace.elapsed for trace in self.traces]
+        lines = [
+            "# HELP wtn_scrape_profiles Profiles scraped in the last run.",
+            "# TYPE wtn_scrape_profiles gauge",
+            f"wtn_scrape_profiles {len(self.traces)}",
+            "# HELP wtn_scrape_run_duration_seconds Wall time of the last run.",
+            "# TYPE wtn_scrape_run_duration_seconds gauge",
+            f"wtn_scrape_run_duration_seconds {time.perf_counter() - self._started:.3f}",
+            "# HELP wtn_scrape_last_run_timestamp_seconds Start time of the last run.",
+            "# TYPE wtn_scrape_last_run_timestamp_seconds gauge",
+            f"wtn_scrape_last_run_timestamp_seconds {self._start_time:.0f}",
+            "# HELP wtn_scrape_events Timeouts, empty results, parse warnings, errors, server errors and HTTP retries in the last run.",
+            "# TYPE wtn_scrape_events gauge",
+        ]
+        lines += [f'wtn_scrape_events{{event="{counter}"}} {n}' for counter, n in self.counters().items()]
+        lines += [
+            "# HELP wtn_scrape_outcomes Profiles per final outcome in the last run.",
+            "# TYPE wtn_scrape_outcomes gauge",
+        ]
+        lines += [f'wtn_scrape_outcomes{{outcome="{outcome}"}} {n}' for outcome, n in self.outcomes().items()]
+        lines += [
+            "# HELP wtn_scrape_retries Retry attempts made in the last run.",
+            "# TYPE wtn_scrape_retries gauge",
+            f"wtn_scrape_retries {sum(trace.attempts - 1 for trace in self.traces)}",
+            "# HELP wtn_scrape_phase_seconds Seconds spent in each phase in the last run.",
+            "# TYPE wtn_scrape_phase_seconds gauge",
+        ]
+        lines += [f'wtn_scrape_phase_seconds{{phase="{phase}"}} {sum(seconds):.3f}'
+                  for phase, seconds in self.phase_seconds().items()]
+        lines += [
+            "# HELP wtn_scrape_transfer_bytes Bytes transferred by the browser in the last run.",
+            "# TYPE wtn_scrape_transfer_bytes gauge",
+            f"wtn_scrape_transfer_bytes {sum(trace.transfer_bytes for trace in self.traces)}",
+            "# HELP wtn_scrape_js_heap_bytes_max Largest page JS heap seen in the last run.",
+            "# TYPE wtn_scrape_js_heap_bytes_max gauge",
+            f"wtn_scrape_js_heap_bytes_max {max((trace.js_heap_bytes for trace in self.traces), default=0)}",
+            "# HELP wtn_scrape_profile_seconds Per-profile scrape time quantiles in the last run.",
+            "# TYPE wtn_scrape_profile_seconds gauge",
+        ]
+        lines += [f'wtn_scrape_profile_seconds{{quantile="{q / 100}"}} {percentile(elapsed, q):.3f}'
+                  for q in (50, 95, 99)]
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def print_summary(self, limit=5):
+        """Print the slowest profiles and a per-phase breakdown."""
+        if not self.traces:
+            return
+        phases = {phase: seconds for phase, seconds in self.phase_seconds().items() if seconds}
+        grand_total = sum(sum(seconds) for seconds in phases.values()) or 1.0
+
+        print("\nTime by phase:")
+        print(f"  {'Phase':<12} {'Total s':>9} {'Mean s':>8} {'p95 s':>8} {'Share':>7}")
+        for phase, seconds in sorted(phases.items(), key=lambda item: -sum(item[1])):
+            print(f"  {phase:<12} {sum(seconds):>9.1f} {statistics.mean(seconds):>8.2f} "
+                  f"{percentile(seconds, 95):>8.2f} {sum(seconds) / grand_total:>7.1%}")
+
+        print(f"\nSlowest {min(limit, len(self.traces))} profiles:")
+        for trace in sorted(self.traces, key=lambda t: -t.elapsed)[:limit]:
+            # Pacing happens outside the scrape call, so it doesn't explain a slow profile
+            spans = {phase: seconds for phase, seconds in trace.spans.items() if phase != 'pacing'}
+            slowest = max(spans.items(), key=lambda item: item[1], default=('-', 0.0))
+            print(f"  {trace.name}: {trace.elapsed:.2f} s (mostly {slowest[0]}, {slowest[1]:.2f} s)")
+
+        transferred = sum(trace.transfer_bytes for trace in self.traces)
+        if transferred:
+            heap = max(trace.js_heap_bytes for trace in self.traces)
+            print(f"\nTransferred {transferred / 1e6:.1f} MB "
+                  f"({transferred / len(self.traces) / 1e3:.0f} KB/profile), peak JS heap {heap / 1e6:.1f} MB")
+
+        self.print_coverage()
+        counters = self.counters()
+        print("\nEvents: " + ", ".join(f"{counter.replace('_', ' ')} {n}" for counter, n in counters.items()))
+
+    def print_coverage(self):
+        """Print how many profiles ended in each outcome, and how retries fared."""
+        outcomes = self.outcomes()
+        total = len(self.traces)
+        complete = sum(outcomes[outcome] for outcome in COMPLETE_OUTCOMES)
+        retried = [trace for trace in self.traces if trace.attempts > 1]
+        recovered = sum(1 for trace in retried if trace.outcome in COMPLETE_OUTCOMES)
+        print(f"\nCoverage: {complete}/{total} profiles complete ({complete / total:.1%})")
+        print("  " + ", ".join(f"{outcome.replace('_', ' ')} {n}" for outcome, n in outcomes.items()))
+        if retried:
+            print(f"  Retried {len(retried)} profiles, {recovered} recovered")
@@ -4,29 +4,87 @@ Script to scrape WTN (World Tennis Number) ratings from USTA player profiles.
 Reads player profile links from a CSV file and extracts current doubles and singles ratings.
 """
 
+import argparse
+import os
+import queue
+import statistics
+import threading
 import pandas as pd
 import time
-from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException,
+)
 import sys
+from wtn_http import HttpFetcher, empty_result, has_rating
+from scrape_journal import JOURNAL_PATH, ScrapeJournal, build_records, compact_journal
+from page_archive import ARCHIVE_DIR, PageArchive
+import ratings_store
+from rating_trends import update_trends
+from ratings_repo import RatingsRepository, has_repo, import_csv
+from freshness import DEFAULT_MAX_AGE_DAYS, FRESHNESS_PATH, FreshnessIndex, parse_since
+from shards import append_status, in_shard, journal_status, parse_shard, shard_paths
+from scrape_metrics import (
+    COMPLETE_OUTCOMES, METRICS_JSONL, METRICS_PROM, TRANSIENT_OUTCOMES, ProfileTrace, ScrapeMetrics, classify_outcome, percentile,
+)
+
+
+# Requests the lean profile blocks at the network layer: images, media, fonts and
+# third-party analytics/ads. usta.com scripts are left alone, the widget needs them.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*",
+    "*adobedtm.com*", "*demdex.net*", "*omtrdc.net*", "*nr-data.net*", "*newrelic.com*",
+    "*scorecardresearch.com*", "*quantserve.com*", "*bing.com/bat*", "*tiktok.com*",
+]
+
+
+def setup_driver(lean=False, page_load_strategy=None):
+    """
+    Set up Selenium WebDriver with Chrome in headless mode.
 
-
-def setup_driver():
-    """Set up Selenium WebDriver with Chrome in headless mode."""
+    Args:
+        lean: Block images, media, fonts and trackers, and keep the cache small
+        page_load_strategy: 'normal', 'eager' or 'none' (default: 'eager' when lean,
+            otherwise Chrome's 'normal')
+    """
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    if lean:
+        # Don't wait for the full load event; scrape_wtn_profile waits for the widget itself
+        page_load_strategy = page_load_strategy or "eager"
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disk-cache-size=1048576")
+        chrome_options.add_argument("--media-cache-size=1")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-component-update")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("--disable-sync")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+    if page_load_strategy:
+        chrome_options.page_load_strategy = page_load_strategy
 
     try:
         driver = webdriver.Chrome(options=chrome_options)
+        if lean:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
         return driver
     except Exception as e:
         print(f"Error setting up Chrome driver: {e}")
@@ -35,7 +93,130 @@ def setup_driver():
         sys.exit(1)
 
 
-def scrape_wtn_profile(driver, url, name):
+class AdaptivePacer:
+    """
+    Global politeness limit shared by all scraping workers.
+
+    A token bucket refilled at `max_per_minute` tokens a minute (holding at most
+    `burst`), no matter how many drivers are pulling profiles at once. Timeouts, crashes
+    and server errors double the spacing between requests, up to `max_backoff` times; each
+    clean profile halves it back towards the base rate, so only sustained failures
+    slow the run down.
+    """
+
+    # Spacing used for backoff when no base rate is set
+    BACKOFF_INTERVAL = 1.0
+
+    def __init__(self, max_per_minute, burst=1, max_backoff=8.0, recovery=0.5):
+        self.interval = 60.0 / max_per_minute if max_per_minute else 0.0
+        self.burst = max(1, burst)
+        self.max_backoff = max_backoff
+        self.recovery = recovery
+        self.backoff = 1.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def current_interval(self):
+        """Seconds per token at the current backoff level."""
+        if self.backoff > 1.0:
+            return max(self.interval, self.BACKOFF_INTERVAL) * self.backoff
+        return self.interval
+
+    def wait(self):
+        """Block until the caller may start its next request."""
+        with self._lock:
+            now = time.monotonic()
+            interval = self.current_interval()
+            if interval:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) / interval)
+            else:
+                self._tokens = float(self.burst)
+            self._updated = now
+            # Taking a token we don't have yet reserves the next one for this caller
+            self._tokens -= 1
+            delay = -self._tokens * interval if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, ok):
+        """Back off after a transient failure; recover after a clean profile."""
+        with self._lock:
+            if ok:
+                self.backoff = max(1.0, self.backoff * self.recovery)
+            else:
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+
+
+class widget_populated:
+    """
+    Expected condition: every WTN section shows a rating value and the widget shows
+    its "Updated" date.
+
+    The widget container is rendered before its values are filled in, so waiting for
+    the container alone isn't enough. Returns the sections once they are populated.
+    """
+
+    def __call__(self, driver):
+        try:
+            sections = driver.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section")
+            if not sections:
+                return False
+            updated = False
+            for section in sections:
+                values = section.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section-value")
+                if not values or not values[0].text.strip():
+                    return False
+                for subtitle in section.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section-subtitle"):
+                    text = subtitle.text.strip()
+                    if text.startswith("Updated") and text.replace("Updated", "").strip():
+                        updated = True
+            return sections if updated else False
+        except StaleElementReferenceException:
+            # The widget re-rendered under us; look again on the next poll
+            return False
+
+
+# Bytes transferred for the page and its resources, and the page's JS heap (Chrome only)
+PAGE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var bytes = (nav ? nav.transferSize : 0) + performance.getEntriesByType('resource')
+    .reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+return [bytes, performance.memory ? performance.memory.usedJSHeapSize : 0];
+"""
+
+
+def record_page_stats(driver, trace):
+    """Add the page's transfer size and JS heap to the trace, for comparing driver profiles."""
+    try:
+        transfer_bytes, heap_bytes = driver.execute_script(PAGE_STATS_SCRIPT)
+        trace.transfer_bytes += int(transfer_bytes or 0)
+        trace.js_heap_bytes = max(trace.js_heap_bytes, int(heap_bytes or 0))
+    except Exception:
+        pass
+
+
+# Error messages that mean the browser or its session is gone, not just the page
+DRIVER_CRASH_MARKERS = (
+    "invalid session id", "chrome not reachable", "disconnected", "session deleted",
+    "no such window", "target window already closed", "tab crashed", "connection refused",
+    "max retries exceeded",
+)
+
+
+def is_driver_crash(error):
+    """True if an exception from Selenium means the driver has to be replaced."""
+    if isinstance(error, (ConnectionError, WebDriverException)):
+        message = str(error).lower()
+        return isinstance(error, ConnectionError) or any(marker in message for marker in DRIVER_CRASH_MARKERS)
+    return "max retries exceeded" in str(error).lower()
+
+
+# Seconds to wait for the widget's values once the widget itself is on the page
+SETTLE_TIMEOUT = 5
+
+
+def scrape_wtn_profile(driver, url, name, trace=None):
     """
     Scrape WTN ratings from a USTA player profile.
 
@@ -43,6 +224,7 @@ def scrape_wtn_profile(driver, url, name):
         driver: Selenium WebDriver instance
         url: USTA profile URL
         name: Player name (for logging)
+        trace: Optional ProfileTrace to record phase timings and counters in
 
     Returns:
         dict: {
@@ -53,115 +235,492 @@ def scrape_wtn_profile(driver, url, name):
             'updated_date': str or None
         }
     """
+    trace = trace if trace is not None else ProfileTrace(name=name)
     try:
         print(f"Scraping profile for {name}...")
 
-        # Clear browser state by navigating to about:blank first
-        # This forces a fresh load of the profile page
-        driver.get("about:blank")
-        time.sleep(0.5)
+        with trace.span('navigation'):
+            # Clear browser state by navigating to about:blank first
+            # This forces a fresh load of the profile page
+            driver.get("about:blank")
 
-        # Now load the profile URL
-        driver.get(url)
+            # Now load the profile URL
+            driver.get(url)
 
         # Wait for the WTN widget sections to be present (this ensures the page has loaded)
         wait = WebDriverWait(driver, 15)
 
         # Initialize variables
-        result = {
-            'doubles_rating': None,
-            'doubles_confidence': None,
-            'singles_rating': None,
-            'singles_confidence': None,
-            'updated_date': None
-        }
+        result = empty_result()
 
         # Try to find WTN ratings on the page
         try:
             # Wait explicitly for WTN widget sections to appear
             try:
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "v-form-wtn-widget__section")))
-                # Add extra time for all content to load
-                time.sleep(2)
+                with trace.span('widget_wait'):
+                    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "v-form-wtn-widget__section")))
             except TimeoutException:
                 print(f"  Timeout waiting for WTN widget to load for {name}")
+                trace.count('timeouts')
                 return result
 
-            # Find all WTN sections (there should be one for doubles and optionally one for singles)
+            # Wait until the values and "Updated" date are filled in, rather than a fixed pause
             try:
-                wtn_sections = driver.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section")
-
-                for section in wtn_sections:
-                    try:
-                        # Get the section title (e.g., "WTN DOUBLES" or "WTN SINGLES")
-                        title_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-title")
-                        title = title_elem.text.strip().upper()
+                with trace.span('settle'):
+                    WebDriverWait(driver, SETTLE_TIMEOUT, poll_frequency=0.1).until(widget_populated())
+            except TimeoutException:
+                print(f"  WTN widget for {name} not fully populated, reading what is there")
+                trace.count('timeouts')
 
-                        # Get the rating value (the large number)
-                        try:
-                            rating_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-value")
-                            rating = rating_elem.text.strip()
-                        except NoSuchElementException:
-                            rating = None
+            # Find all WTN sections (there should be one for doubles and optionally one for singles)
+            with trace.span('parse'):
+                try:
+                    wtn_sections = driver.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section")
 
-                        # Get the confidence level
-                        try:
-                            conf_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-confidence")
-                            confidence_text = conf_elem.text.strip()
-                            # Extract just "High", "Medium", or "Low" from "High Confidence"
-                            confidence = confidence_text.split()[0] if confidence_text else None
-                        except NoSuchElementException:
-                            confidence = None
-
-                        # Get the updated date (distinct from "Last Played")
+                    for section in wtn_sections:
                         try:
-                            # Find all subtitle elements in this section
-                            subtitle_elems = section.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section-subtitle")
-                            for subtitle_elem in subtitle_elems:
-                                subtitle_text = subtitle_elem.text.strip()
-                                if "Updated" in subtitle_text:
-                                    # Extract date from "Updated 01/28/2026" format
-                                    date_str = subtitle_text.replace("Updated ", "").strip()
-                                    # Only set it once (both sections should have the same updated date)
-                                    if not result['updated_date']:
-                                        result['updated_date'] = date_str
-                                    break
-                        except NoSuchElementException:
-                            pass
-
-                        # Assign to appropriate field based on title
-                        if "DOUBLES" in title:
-                            result['doubles_rating'] = rating
-                            result['doubles_confidence'] = confidence
-                        elif "SINGLES" in title:
-                            result['singles_rating'] = rating
-                            result['singles_confidence'] = confidence
-
-                    except Exception as e:
-                        print(f"  Warning: Could not parse section: {e}")
-                        continue
-
-            except Exception as e:
-                print(f"  Warning: Could not find WTN sections for {name}: {e}")
+                            # Get the section title (e.g., "WTN DOUBLES" or "WTN SINGLES")
+                            title_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-title")
+                            title = title_elem.text.strip().upper()
+
+                            # Get the rating value (the large number)
+                            try:
+                                rating_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-value")
+                                rating = rating_elem.text.strip()
+                            except NoSuchElementException:
+                                rating = None
+
+                            # Get the confidence level
+                            try:
+                                conf_elem = section.find_element(By.CLASS_NAME, "v-form-wtn-widget__section-confidence")
+                                confidence_text = conf_elem.text.strip()
+                                # Extract just "High", "Medium", or "Low" from "High Confidence"
+                                confidence = confidence_text.split()[0] if confidence_text else None
+                            except NoSuchElementException:
+                                confidence = None
+
+                            # Get the updated date (distinct from "Last Played")
+                            try:
+                                # Find all subtitle elements in this section
+                                subtitle_elems = section.find_elements(By.CLASS_NAME, "v-form-wtn-widget__section-subtitle")
+                                for subtitle_elem in subtitle_elems:
+                                    subtitle_text = subtitle_elem.text.strip()
+                                    if "Updated" in subtitle_text:
+                                        # Extract date from "Updated 01/28/2026" format
+                                        date_str = subtitle_text.replace("Updated ", "").strip()
+                                        # Only set it once (both sections should have the same updated date)
+                                        if not result['updated_date']:
+                                            result['updated_date'] = date_str
+                                        break
+                            except NoSuchElementException:
+                                pass
+
+                            # Assign to appropriate field based on title
+                            if "DOUBLES" in title:
+                                result['doubles_rating'] = rating
+                                result['doubles_confidence'] = confidence
+                            elif "SINGLES" in title:
+                                result['singles_rating'] = rating
+                                result['singles_confidence'] = confidence
+
+                        except Exception as e:
+                            print(f"  Warning: Could not parse section: {e}")
+                            trace.count('parse_warnings')
+                            continue
+
+                    # Keep the widget markup for the page archive; parse_wtn_html reads it back
+                    result['raw_page'] = "\n".join(section.get_attribute('outerHTML') for section in wtn_sections)
+                    result['content_type'] = "text/html"
+
+                except Exception as e:
+                    print(f"  Warning: Could not find WTN sections for {name}: {e}")
+                    trace.count('parse_warnings')
 
         except TimeoutException:
             print(f"  Timeout loading profile for {name}")
+            trace.count('timeouts')
 
+        record_page_stats(driver, trace)
         return result
 
     except Exception as e:
-        print(f"  Error scraping profile for {name}: {e}")
-        return {
-            'doubles_rating': None,
-            'doubles_confidence': None,
-            'singles_rating': None,
-            'singles_confidence': None,
-            'updated_date': None
-        }
+        if is_driver_crash(e):
+            print(f"  Browser crashed while scraping {name}: {e}")
+            trace.count('driver_crashes')
+        else:
+            print(f"  Error scraping profile for {name}: {e}")
+            trace.count('errors')
+        return empty_result()
 
 
-def main():
+class SeleniumBackend:
+    """
+    One worker's browser session. The driver is started on first use when lazy, and
+    replaced on the next profile if it crashes.
+    """
+
+    def __init__(self, lazy=False, lean=False, page_load_strategy=None):
+        self.driver = None
+        self.available = True
+        self.driver_options = {'lean': lean, 'page_load_strategy': page_load_strategy}
+        if not lazy:
+            self.driver = setup_driver(**self.driver_options)
+
+    def scrape(self, row, trace=None):
+        trace = trace if trace is not None else ProfileTrace(row['UAID'], row['Name'])
+        if self.driver is None:
+            # Without a browser the page was never looked at; counting a crash keeps
+            # the profile out of the complete outcomes so it stays due
+            if not self.available:
+                trace.count('driver_crashes')
+                return empty_result()
+            try:
+                self.driver = setup_driver(**self.driver_options)
+            except SystemExit:
+                print("  Selenium fallback unavailable")
+                self.available = False
+                trace.count('driver_crashes')
+                return empty_result()
+        result = scrape_wtn_profile(self.driver, row['WTN_Profile'], row['Name'], trace)
+        if trace.counters.get('driver_crashes'):
+            print("  Replacing crashed browser")
+            self.close()
+        return result
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                # A crashed driver may not shut down cleanly; it is discarded either way
+                pass
+            self.driver = None
+
+
+class HttpBackend:
+    """One worker's HTTP fetch path, falling back to Selenium when the response has no ratings."""
+
+    def __init__(self, fetcher, fallback=None):
+        self.fetcher = fetcher
+        self.fallback = fallback
+
+    def scrape(self, row, trace=None):
+        result = self.fetcher.scrape(row['UAID'], row['Name'], trace)
+        if not has_rating(result) and self.fallback is not None:
+            print(f"  No WTN data over HTTP for {row['Name']}, falling back to Selenium")
+            return self.fallback.scrape(row, trace)
+        return result
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+def scrape_profiles(backends, profiles, pacer, delay=0.0, retries=2, retry_backoff=10.0):
+    """
+    Scrape profiles with a pool of workers pulling from a shared queue.
+
+    Each backend runs in its own thread with its own browser session or HTTP
+    connection. Profiles that fail transiently (timeout, driver crash, 429/5xx or dropped
+    connection) go to a deferred retry queue that is only worked once the main pass is done, after
+    an exponential backoff. Results are yielded in roster order, except that
+    retried profiles come when their retry finishes.
+
+    Args:
+        backends: List of SeleniumBackend/HttpBackend instances, one per worker
+        profiles: List of profile rows (dicts with Name, UAID, WTN_Profile)
+        pacer: AdaptivePacer shared by all workers
+        delay: Extra fixed seconds each worker pauses after a profile
+        retries: Retries per profile for transient failures
+        retry_backoff: Seconds before the first retry; doubles with each attempt
+
+    Yields:
+        tuple: (position, profile row, result dict from scrape_wtn_profile,
+                ProfileTrace with the profile's timings and outcome)
+    """
+    # Ordered by (attempt, not before, position): every first attempt comes before any retry
+    tasks = queue.PriorityQueue()
+    for position in range(len(profiles)):
+        tasks.put((0, 0.0, position, None))
+    done = queue.Queue()
+    outstanding = [len(profiles)]
+    lock = threading.Lock()
+
+    def finish(position, result, trace):
+        with lock:
+            outstanding[0] -= 1
+        done.put((position, result, trace, True))
+
+    def attempt_profile(backend, attempt, not_before, position, earlier):
+        row = profiles[position]
+        wait = not_before - time.monotonic()
+        trace = ProfileTrace(row['UAID'], row['Name'])
+        if wait > 0:
+            with trace.span('pacing'):
+                time.sleep(wait)
+        try:
+            with trace.span('pacing'):
+                pacer.wait()
+            start = time.perf_counter()
+            result = backend.scrape(row, trace)
+            trace.elapsed = time.perf_counter() - start
+            if delay:
+                with trace.span('pacing'):
+                    time.sleep(delay)
+        except Exception as e:
+            print(f"  Error in worker for {row['Name']}: {e}")
+            trace.count('errors')
+            result = empty_result()
+        if not has_rating(result):
+            trace.count('empty_results')
+        trace.outcome = classify_outcome(has_rating(result), trace.counters)
+        if earlier is not None:
+            trace.absorb(earlier)
+        pacer.record(ok=trace.outcome not in TRANSIENT_OUTCOMES)
+
+        if trace.outcome in TRANSIENT_OUTCOMES and attempt < retries:
+            backoff = retry_backoff * 2 ** attempt
+            print(f"  {trace.outcome.replace('_', ' ').capitalize()} for {row['Name']}, "
+                  f"retrying after the main pass (in {backoff:.0f}s or later)")
+            done.put((position, None, trace, False))
+            tasks.put((attempt + 1, time.monotonic() + backoff, position, trace))
+        else:
+            finish(position, result, trace)
+
+    def worker(backend):
+        while True:
+            try:
+                attempt, not_before, position, earlier = tasks.get(timeout=0.2)
+            except queue.Empty:
+                with lock:
+                    if outstanding[0] == 0:
+                        return
+                continue
+            try:
+                attempt_profile(backend, attempt, not_before, position, earlier)
+            except Exception as e:
+                # Whatever went wrong, the profile must still be reported or the run never ends
+                row = profiles[position]
+                print(f"  Worker failed on {row['Name']}: {e}")
+                trace = ProfileTrace(row['UAID'], row['Name'])
+                trace.count('errors')
+                trace.outcome = 'error'
+                if earlier is not None:
+                    trace.absorb(earlier)
+                finish(position, empty_result(), trace)
+
+    threads = [threading.Thread(target=worker, args=(backend,), daemon=True) for backend in backends]
+    for thread in threads:
+        thread.start()
+
+    # Buffer out-of-order results until the next profile in roster order is ready;
+    # deferred profiles are skipped over and yielded whenever their retry finishes
+    pending = {}
+    deferred = set()
+    next_position = 0
+    finished = 0
+    while finished < len(profiles):
+        position, result, trace, final = done.get()
+        if not final:
+            deferred.add(position)
+        elif position in deferred:
+            finished += 1
+            yield position, profiles[position], result, trace
+        else:
+            pending[position] = (result, trace)
+        while next_position in pending or next_position in deferred:
+            if next_position in pending:
+                result, trace = pending.pop(next_position)
+                finished += 1
+                yield next_position, profiles[next_position], result, trace
+            next_position += 1
+
+    for thread in threads:
+        thread.join()
+
+
+def open_repository(output_csv):
+    """Open the ratings repository, importing the CSV the first time."""
+    if not has_repo():
+        print(f"Creating ratings repository from {output_csv}...")
+        return import_csv(output_csv)
+    return RatingsRepository()
+
+
+def fold_journal(journal, output_csv, freshness=None, repo=None, status_csv=None):
+    """
+    Record the journal's scrapes in the freshness index (or, for a shard, its status
+    file), then compact it into the stores.
+    """
+    entries = list(journal.entries())
+    if freshness is not None:
+        # Failed profiles stay due, so the next run tries them again
+        for entry in entries:
+            if entry.get('outcome', 'ok') in COMPLETE_OUTCOMES:
+                freshness.record(entry['uaid'], entry['scraped_at'], entry.get('updated'))
+    if status_csv is not None:
+        append_status(journal_status(entries), status_csv)
+    records = compact_journal(journal, output_csv, repo)
+    if freshness is not None:
+        freshness.save()
+    # Keep the columnar mirror in sync with the main CSV
+    if output_csv == ratings_store.RATINGS_CSV and ratings_store.has_parquet():
+        ratings_store.append_parquet(records)
+    return records
+
+
+def rebase_url(url, base_url):
+    """Point a URL at another scheme and host, keeping its path, query and fragment."""
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+def make_backends(args):
+    """
+    Set up one backend per worker.
+
+    Returns:
+        tuple: (list of backends, shared HttpFetcher or None)
+    """
+    backends = []
+    fetcher = None
+    driver_options = {'lean': args.driver_profile == "lean", 'page_load_strategy': args.page_load}
+    try:
+        if args.backend == "http":
+            print(f"Setting up HTTP session pool for {args.workers} worker(s)...")
+            fetcher = HttpFetcher(args.http_url, pool_size=args.workers)
+            for _ in range(args.workers):
+                fallback = None if args.no_fallback else SeleniumBackend(lazy=True, **driver_options)
+                backends.append(HttpBackend(fetcher, fallback))
+        else:
+            print(f"Setting up {args.workers} web driver(s)...")
+            for _ in range(args.workers):
+                backends.append(SeleniumBackend(**driver_options))
+    except BaseException:
+        close_backends(backends, fetcher)
+        raise
+    return backends, fetcher
+
+
+def close_backends(backends, fetcher):
+    """Close the browsers and HTTP sessions."""
+    for backend in backends:
+        backend.close()
+    if fetcher is not None:
+        fetcher.close()
+
+
+def make_pacer(args):
+    return AdaptivePacer(args.max_rate, burst=args.burst, max_backoff=args.max_backoff)
+
+
+def run_benchmark(args, profiles_df):
+    """
+    Scrape profiles without writing anything and report throughput and latency.
+
+    Meant to run against benchmarks/fixture_server.py (via --base-url) so concurrency
+    and wait-strategy changes can be compared offline.
+    """
+    if args.limit:
+        profiles_df = profiles_df.head(args.limit)
+    profiles = profiles_df.to_dict('records')
+    print(f"Benchmarking {len(profiles)} profiles with {args.workers} {args.backend} worker(s)...")
+
+    backends, fetcher = make_backends(args)
+    metrics = ScrapeMetrics()
+    failures = 0
+    start = time.perf_counter()
+    try:
+        for _, row, result, trace in scrape_profiles(backends, profiles, make_pacer(args), args.delay,
+                                                     args.retries, args.retry_backoff):
+            metrics.add(trace)
+            if not has_rating(result):
+                failures += 1
+    finally:
+        close_backends(backends, fetcher)
+    wall = time.perf_counter() - start
+    latencies = [trace.elapsed for trace in metrics.traces]
+
+    print("\nBenchmark results")
+    print(f"  Profiles:           {len(profiles)}")
+    print(f"  Wall time:          {wall:.1f} s")
+    print(f"  Profiles/minute:    {len(profiles) / wall * 60 if wall else 0:.1f}")
+    print(f"  Latency p50:        {percentile(latencies, 50):.2f} s")
+    print(f"  Latency p95:        {percentile(latencies, 95):.2f} s")
+    print(f"  Latency mean:       {statistics.mean(latencies) if latencies else 0:.2f} s")
+    print(f"  Failures (no data): {failures}")
+    print(f"  HTTP retries:       {metrics.counters()['http_retries']}")
+    metrics.print_summary()
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Scrape WTN ratings from USTA player profiles.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of workers (Chrome drivers or HTTP connections) to run in parallel (default: 1)")
+    parser.add_argument("--backend", choices=["http", "selenium"], default="selenium",
+                        help="Fetch profiles over plain HTTP or with headless Chrome (default: selenium)")
+    parser.add_argument("--http-url", default=None,
+                        help="URL template for the WTN data endpoint, with {uaid} placeholder (required with --backend http)")
+    parser.add_argument("--no-fallback", action="store_true",
+                        help="With --backend http, don't fall back to Selenium for profiles without data")
+    parser.add_argument("--driver-profile", choices=["full", "lean"], default="full",
+                        help="Chrome profile: full page loads, or lean (no images/media/fonts/trackers, "
+                             "small cache, eager page load) (default: full)")
+    parser.add_argument("--page-load", choices=["normal", "eager", "none"], default=None,
+                        help="Chrome page-load strategy (default: eager with the lean profile, otherwise normal)")
+    parser.add_argument("--max-rate", type=float, default=30.0,
+                        help="Global cap on profile requests per minute across all workers (default: 30)")
+    parser.add_argument("--burst", type=int, default=1,
+                        help="Requests that may start back to back before --max-rate spacing applies (default: 1)")
+    parser.add_argument("--max-backoff", type=float, default=8.0,
+                        help="Largest factor timeouts and errors may slow the request rate by (default: 8)")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Extra fixed seconds each worker waits after a profile (default: 0)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Retries for profiles that time out, crash the browser or get a 429/5xx (default: 2)")
+    parser.add_argument("--retry-backoff", type=float, default=10.0,
+                        help="Seconds before the first retry, doubling each time (default: 10)")
+    parser.add_argument("--journal", default=JOURNAL_PATH,
+                        help=f"Append-only scrape journal (default: {JOURNAL_PATH})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the unfinished run in the journal, skipping profiles already scraped")
+    parser.add_argument("--since", type=parse_since, default=None,
+                        help="Only scrape players whose last known WTN update is before this date (YYYY-MM-DD)")
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE_DAYS,
+                        help=f"Re-check players not scraped for this many days (default: {DEFAULT_MAX_AGE_DAYS})")
+    parser.add_argument("--force-all", action="store_true",
+                        help="Scrape every profile, ignoring the freshness index")
+    parser.add_argument("--archive", default=ARCHIVE_DIR,
+                        help=f"Raw page archive for `page_archive.py reparse` (default: {ARCHIVE_DIR})")
+    parser.add_argument("--no-archive", action="store_true", help="Don't archive raw pages")
+    parser.add_argument("--metrics-jsonl", default=METRICS_JSONL,
+                        help=f"Per-profile timing spans written at the end of a run (default: {METRICS_JSONL})")
+    parser.add_argument("--metrics-prom", default=METRICS_PROM,
+                        help=f"Prometheus textfile written at the end of a run (default: {METRICS_PROM})")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="Scrape only shard i of N (e.g. 1/4), split by UAID hash, into data/shards/; "
+                             "combine shards with `python shards.py merge`")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Measure throughput and latency without writing any data (use with --base-url)")
+    parser.add_argument("--base-url", default=None,
+                        help="Send profile requests to this scheme://host instead of usta.com (e.g. the fixture server)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Only scrape the first N scheduled profiles")
+    args = parser.parse_args(argv)
+    if args.backend == "http" and not args.http_url:
+        parser.error("--backend http needs --http-url: the profile page is an app shell without the WTN data")
+    if args.base_url and args.http_url:
+        args.http_url = rebase_url(args.http_url, args.base_url)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def main(argv=None):
     """Main function to scrape all profiles and append to wtn_ratings.csv."""
+    args = parse_args(argv)
 
     # File paths
     input_csv = "data/wtn_profile_links.csv"
@@ -175,88 +734,102 @@ def main():
         print(f"Error: Could not find {input_csv}")
         sys.exit(1)
 
-    print(f"Found {len(profiles_df)} profiles to scrape")
+    print(f"Found {len(profiles_df)} profiles")
+
+    if args.base_url:
+        profiles_df = profiles_df.assign(
+            WTN_Profile=profiles_df['WTN_Profile'].map(lambda url: rebase_url(url, args.base_url)))
+    if args.benchmark:
+        run_benchmark(args, profiles_df)
+        return
+
+    # A shard scrapes its slice of the roster into its own files; `shards.py merge`
+    # later folds them into the main store, freshness index and repository
+    status_csv = None
+    if args.shard:
+        index, count = args.shard
+        paths = shard_paths(index, count)
+        profiles_df = profiles_df[in_shard(profiles_df['UAID'], index, count)]
+        print(f"Shard {index}/{count}: {len(profiles_df)} profiles")
+        if args.journal == JOURNAL_PATH:
+            args.journal = paths['journal']
+        status_csv = paths['status']
+        os.makedirs(os.path.dirname(paths['ratings']), exist_ok=True)
+
+    # Only schedule profiles whose WTN could have changed since we last looked
+    freshness = FreshnessIndex(FRESHNESS_PATH).load(ratings_csv=output_csv)
+    if not args.force_all:
+        due = freshness.select_due(profiles_df, since=args.since, max_age_days=args.max_age)
+        if status_csv is not None:
+            skipped = profiles_df[~profiles_df['UAID'].isin(due['UAID'])]
+            append_status([{'UAID': int(row.UAID), 'Name': row.Name, 'Status': 'not_due',
+                            'Scraped_At': "", 'Updated': ""} for row in skipped.itertuples(index=False)],
+                          status_csv)
+        profiles_df = due
+    if args.limit:
+        profiles_df = profiles_df.head(args.limit)
+    print(f"{len(profiles_df)} profiles to scrape")
+
+    if args.shard:
+        output_csv = paths['ratings']
+        freshness = None
+        repo = None
+    else:
+        # Scraped rows are written through to the repository with batched upserts
+        repo = open_repository(output_csv)
+
+    # Each result is appended to the journal as it arrives; the journal is
+    # folded into the ratings CSV at the end of the run.
+    journal = ScrapeJournal(args.journal)
+    if args.resume:
+        done_uaids = journal.completed_uaids()
+        profiles_df = profiles_df[~profiles_df['UAID'].isin(done_uaids)]
+        print(f"Resuming run: {len(done_uaids)} profiles already scraped, {len(profiles_df)} remaining")
+    elif not journal.is_empty():
+        leftover = fold_journal(journal, output_csv, freshness, repo, status_csv)
+        print(f"Compacted {len(leftover)} records left in {args.journal} by an unfinished run")
+    if profiles_df.empty:
+        if not journal.is_empty():
+            fold_journal(journal, output_csv, freshness, repo, status_csv)
+        print("All profiles are up to date, nothing to scrape")
+        if repo is not None:
+            repo.close()
+        return
+    journal.open(resume=args.resume)
+
+    # Set up one backend per worker
+    backends = []
+    fetcher = None
+    pacer = make_pacer(args)
+    metrics = ScrapeMetrics()
+    archive = None if args.no_archive else PageArchive(args.archive)
 
-    # Load existing ratings CSV or create new dataframe
     try:
-        ratings_df = pd.read_csv(output_csv)
-        print(f"Loaded existing ratings CSV with {len(ratings_df)} records")
-    except FileNotFoundError:
-        print("Creating new ratings CSV file")
-        ratings_df = pd.DataFrame(columns=['Name', 'UAID', 'Date', 'Format', 'Rating', 'Confidence'])
-
-    # List to store new rating records
-    new_records = []
+        backends, fetcher = make_backends(args)
 
-    # Set up the web driver
-    print("Setting up web driver...")
-    driver = setup_driver()
-
-    try:
         # Scrape each profile
-        for idx, row in profiles_df.iterrows():
-            name = row['Name']
-            uaid = row['UAID']
-            url = row['WTN_Profile']
-
-            # Scrape the profile
-            result = scrape_wtn_profile(driver, url, name)
-
-            # Get the current date for scraping
-            scrape_date = datetime.now().strftime("%Y-%m-%d")
-
-            # Use the updated date from the profile if available, otherwise use scrape date
-            record_date = result['updated_date'] if result['updated_date'] else scrape_date
-
-            # Create record for doubles rating if available
-            if result['doubles_rating']:
-                new_records.append({
-                    'Name': name,
-                    'UAID': uaid,
-                    'Date': record_date,
-                    'Format': 'Doubles',
-                    'Rating': result['doubles_rating'],
-                    'Confidence': result['doubles_confidence'] if result['doubles_confidence'] else 'Unknown'
-                })
-
-            # Create record for singles rating if available
-            if result['singles_rating']:
-                new_records.append({
-                    'Name': name,
-                    'UAID': uaid,
-                    'Date': record_date,
-                    'Format': 'Singles',
-                    'Rating': result['singles_rating'],
-                    'Confidence': result['singles_confidence'] if result['singles_confidence'] else 'Unknown'
-                })
-
+        profiles = profiles_df.to_dict('records')
+        for idx, row, result, trace in scrape_profiles(backends, profiles, pacer, args.delay,
+                                                       args.retries, args.retry_backoff):
+            with trace.span('persist'):
+                records = build_records(row, result)
+                journal.append(row['UAID'], row['Name'], records, result['updated_date'], trace.outcome)
+                if archive is not None and result.get('raw_page'):
+                    archive.store(row['UAID'], row['Name'], result['raw_page'], result.get('content_type'))
+            metrics.add(trace)
+
+            print(f"  Outcome: {trace.outcome}" + (f" after {trace.attempts} attempts" if trace.attempts > 1 else ""))
             print(f"  Doubles: {result['doubles_rating']} ({result['doubles_confidence']})")
             print(f"  Singles: {result['singles_rating']} ({result['singles_confidence']})")
-            print(f"  Date: {record_date}")
-
-            # Be polite to the server - add a delay between requests
-            time.sleep(2)
+            print(f"  Date: {records[0]['Date'] if records else 'n/a'}")
 
-            # Save progress every 10 profiles
             if (idx + 1) % 10 == 0:
-                # Append new records to ratings dataframe
-                if new_records:
-                    temp_df = pd.DataFrame(new_records)
-                    ratings_df = pd.concat([ratings_df, temp_df], ignore_index=True)
-                    ratings_df.to_csv(output_csv, index=False)
-                    new_records = []  # Clear the list after saving
-                print(f"Progress saved: {idx + 1}/{len(profiles_df)} profiles scraped")
-
-        # Save any remaining records
-        if new_records:
-            temp_df = pd.DataFrame(new_records)
-            ratings_df = pd.concat([ratings_df, temp_df], ignore_index=True)
-
-        # Save final results
-        ratings_df.to_csv(output_csv, index=False)
+                print(f"Progress: {idx + 1}/{len(profiles)} profiles scraped")
+
+        # Fold the journal into the ratings CSV
+        new_records = fold_journal(journal, output_csv, freshness, repo, status_csv)
         print(f"\nScraping complete! Results appended to {output_csv}")
-        print(f"Total profiles scraped: {len(profiles_df)}")
-        print(f"Total records in CSV: {len(ratings_df)}")
+        print(f"Total profiles scraped: {len(profiles)}")
 
         # Count new records by format
         new_doubles = sum(1 for r in new_records if r.get('Format') == 'Doubles')
@@ -264,9 +837,20 @@ def main():
         print(f"New doubles ratings added: {new_doubles}")
         print(f"New singles ratings added: {new_singles}")
 
+        # Refresh the trend tables the Movers tab reads; shards do it when merged
+        if new_records and not args.shard:
+            update_trends()
+
     finally:
-        # Close the browser
-        driver.quit()
+        if metrics.traces:
+            metrics.write_jsonl(args.metrics_jsonl)
+            metrics.write_prometheus(args.metrics_prom)
+            metrics.print_summary()
+            print(f"Metrics written to {args.metrics_jsonl} and {args.metrics_prom}")
+        journal.close()
+        if repo is not None:
+            repo.close()
+        close_backends(backends, fetcher)
         print("Browser closed")
 
 
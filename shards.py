@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Roster sharding for scraping runs spread over several machines.
+
+`scrape_wtn_ratings.py --shard i/N` scrapes only the profiles whose UAID hashes to
+shard i of N, so assignments stay the same from run to run and machine to machine.
+Each shard writes its own ratings CSV and a status file under data/shards/. The
+merge command folds every shard into the main ratings store, deduplicating on
+(UAID, Date, Format), and reports the profiles each shard failed or never reached.
+
+Usage:
+    python scrape_wtn_ratings.py --shard 1/4     # on each machine, 1/4 .. 4/4
+    python shards.py merge                       # after copying data/shards/ back
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+import ratings_store
+from freshness import FRESHNESS_PATH, FreshnessIndex
+from rating_trends import update_trends
+from ratings_repo import DB_PATH, RatingsRepository, has_repo, import_csv
+from scrape_journal import RATINGS_COLUMNS, append_csv, rating_keys
+
+
+SHARD_DIR = "data/shards"
+STATUS_COLUMNS = ['UAID', 'Name', 'Status', 'Scraped_At', 'Updated']
+
+# Which row wins when shards disagree on a (UAID, Date, Format): the most confident
+# reading, then the lowest shard number, then the lowest rating
+CONFIDENCE_RANK = {'High': 0, 'Medium': 1, 'Unknown': 2, 'Low': 3}
+
+_SHARD_FILE = re.compile(r"wtn_ratings\.shard-(\d+)-of-(\d+)\.csv$")
+
+
+def parse_shard(text):
+    """Parse an 'i/N' shard spec (1 <= i <= N), for use as an argparse type."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {text!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def shard_of(uaid, count):
+    """Shard number (1..count) of a UAID; a content hash, so stable across runs and machines."""
+    digest = hashlib.sha1(str(int(uaid)).encode()).hexdigest()
+    return int(digest[:8], 16) % count + 1
+
+
+def in_shard(uaids, index, count):
+    """Boolean mask of the UAIDs that belong to shard index of count."""
+    return uaids.map(lambda uaid: shard_of(uaid, count) == index)
+
+
+def shard_paths(index, count, shard_dir=SHARD_DIR):
+    """Ratings CSV, status CSV and journal paths of one shard."""
+    name = f"shard-{index}-of-{count}"
+    return {
+        'ratings': os.path.join(shard_dir, f"wtn_ratings.{name}.csv"),
+        'status': os.path.join(shard_dir, f"status.{name}.csv"),
+        'journal': os.path.join(shard_dir, f"scrape_journal.{name}.jsonl"),
+    }
+
+
+def append_status(rows, path):
+    """Append profile status rows (dicts with STATUS_COLUMNS) to a shard's status file."""
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    pd.DataFrame(rows, columns=STATUS_COLUMNS).to_csv(path, mode='a', header=not exists, index=False)
+
+
+def journal_status(entries):
+    """Status rows for the profiles recorded in a scrape journal."""
+    return [
+        {
+            'UAID': int(entry['uaid']),
+            'Name': entry['name'],
+            'Status': entry.get('outcome') or ('ok' if entry['records'] else 'no_rating'),
+            'Scraped_At': entry['scraped_at'],
+            'Updated': entry.get('updated') or "",
+        }
+        for entry in entries
+    ]
+
+
+def find_shards(shard_dir=SHARD_DIR):
+    """
+    Shard outputs waiting to be merged.
+
+    Returns:
+        list: (index, count) of every shard ratings file, sorted by index
+    """
+    shards = []
+    for path in glob.glob(os.path.join(shard_dir, "wtn_ratings.shard-*-of-*.csv")):
+        match = _SHARD_FILE.search(os.path.basename(path))
+        if match:
+            shards.append((int(match.group(1)), int(match.group(2))))
+    return sorted(shards)
+
+
+def resolve_conflicts(ratings):
+    """
+    Reduce shard rows to one per (UAID, Date, Format).
+
+    Args:
+        ratings: Shard ratings with a _shard column
+
+    Returns:
+        tuple: (resolved DataFrame in RATINGS_COLUMNS, number of keys the shards disagreed on)
+    """
+    work = ratings.assign(
+        _key=rating_keys(ratings),
+        _confidence=ratings['Confidence'].map(CONFIDENCE_RANK).fillna(len(CONFIDENCE_RANK)),
+        _rating=pd.to_numeric(ratings['Rating'], errors='coerce'),
+    )
+    values = work.groupby('_key', sort=False)['_rating'].transform('nunique')
+    conflicts = int(work.loc[values > 1, '_key'].nunique())
+    ordered = work.sort_values(['_confidence', '_shard', '_rating'], kind='stable', na_position='last')
+    resolved = ordered.drop_duplicates('_key', keep='first').sort_index()
+    return resolved[RATINGS_COLUMNS], conflicts
+
+
+def load_shards(shards, shard_dir=SHARD_DIR):
+    """Concatenate the shards' ratings and status rows, tagged with their shard number."""
+    ratings, status = [], []
+    for index, count in shards:
+        paths = shard_paths(index, count, shard_dir)
+        if os.path.exists(paths['ratings']) and os.path.getsize(paths['ratings']) > 0:
+            ratings.append(pd.read_csv(paths['ratings'], encoding='utf-8-sig').assign(_shard=index))
+        if os.path.exists(paths['status']):
+            status.append(pd.read_csv(paths['status'], dtype={'Updated': str}).assign(_shard=index))
+    ratings = pd.concat(ratings, ignore_index=True) if ratings else pd.DataFrame(columns=RATINGS_COLUMNS + ['_shard'])
+    status = pd.concat(status, ignore_index=True) if status else pd.DataFrame(columns=STATUS_COLUMNS + ['_shard'])
+    # A profile scraped more than once keeps its most recent status
+    status = status.drop_duplicates('UAID', keep='last')
+    return ratings, status
+
+
+def coverage(profiles, status, count):
+    """
+    Per-shard coverage of the roster.
+
+    Returns:
+        DataFrame: One row per shard with Assigned, OK, No_Rating, Failed, Not_Due and
+            Missing counts, and Missing_UAIDs/Failed_UAIDs lists
+    """
+    assigned = profiles.assign(_shard=profiles['UAID'].map(lambda uaid: shard_of(uaid, count)))
+    seen = status.set_index('UAID')['Status']
+    rows = []
+    for index in range(1, count + 1):
+        uaids = assigned.loc[assigned['_shard'] == index, 'UAID']
+        statuses = uaids.map(seen)
+        failed = statuses.notna() & ~statuses.isin(['ok', 'no_rating', 'not_due'])
+        rows.append({
+            'Shard': f"{index}/{count}",
+            'Assigned': len(uaids),
+            'OK': int((statuses == 'ok').sum()),
+            'No_Rating': int((statuses == 'no_rating').sum()),
+            'Failed': int(failed.sum()),
+            'Not_Due': int((statuses == 'not_due').sum()),
+            'Missing': int(statuses.isna().sum()),
+            'Missing_UAIDs': uaids[statuses.isna()].tolist(),
+            'Failed_UAIDs': uaids[failed].tolist(),
+        })
+    return pd.DataFrame(rows)
+
+
+def report(table, profiles, limit=10):
+    """Print the coverage table and the names of missing and failed profiles."""
+    print("\nShard coverage:")
+    print(table.drop(columns=['Missing_UAIDs', 'Failed_UAIDs']).to_string(index=False))
+    names = profiles.set_index('UAID')['Name']
+    for row in table.itertuples(index=False):
+        for label, uaids in (("missing", row.Missing_UAIDs), ("failed", row.Failed_UAIDs)):
+            if uaids:
+                shown = ", ".join(f"{names.get(uaid, '?')} ({uaid})" for uaid in uaids[:limit])
+                more = f" and {len(uaids) - limit} more" if len(uaids) > limit else ""
+                print(f"  Shard {row.Shard} {label}: {shown}{more}")
+
+
+def merge_shards(shard_dir=SHARD_DIR, ratings_csv=ratings_store.RATINGS_CSV,
+                 profiles_csv=ratings_store.PROFILES_CSV, dry_run=False, keep=False):
+    """
+    Fold all shard outputs into the main ratings store.
+
+    Rows are deduplicated across shards, then appended to the ratings CSV (refusing
+    keys it already holds) and written through to the SQLite repository and Parquet
+    mirror. Shard status is recorded in the freshness index, and the merged shard
+    files are moved to shard_dir/merged/<timestamp>/ unless keep is set. The
+    repository and freshness index are the ones next to ratings_csv; the Parquet
+    mirror and trend tables are only updated for the main ratings CSV.
+
+    Returns:
+        list: The records appended to the main store
+    """
+    shards = find_shards(shard_dir)
+    if not shards:
+        print(f"No shard outputs found in {shard_dir}")
+        return []
+    counts = {count for _, count in shards}
+    if len(counts) > 1:
+        raise ValueError(f"Shard outputs from different shard counts in {shard_dir}: {sorted(counts)}")
+    count = counts.pop()
+    print(f"Merging {len(shards)} of {count} shards from {shard_dir}...")
+
+    ratings, status = load_shards(shards, shard_dir)
+    resolved, conflicts = resolve_conflicts(ratings)
+    print(f"Shard rows: {len(ratings)}, unique (UAID, Date, Format): {len(resolved)}, conflicting keys: {conflicts}")
+    report(coverage(pd.read_csv(profiles_csv), status, count), pd.read_csv(profiles_csv))
+
+    if dry_run:
+        print("\nDry run: nothing written")
+        return []
+
+    data_dir = os.path.dirname(ratings_csv)
+    db_path = os.path.join(data_dir, os.path.basename(DB_PATH))
+    freshness_path = os.path.join(data_dir, os.path.basename(FRESHNESS_PATH))
+    main_store = ratings_csv == ratings_store.RATINGS_CSV
+
+    repo = RatingsRepository(db_path) if has_repo(db_path) else import_csv(ratings_csv, db_path)
+    try:
+        records = append_csv(resolved.to_dict('records'), ratings_csv, repo)
+        repo.upsert(records)
+    finally:
+        repo.close()
+    if main_store and ratings_store.has_parquet():
+        ratings_store.append_parquet(records)
+
+    freshness = FreshnessIndex(freshness_path).load(ratings_csv=ratings_csv)
+    for row in status[status['Status'].isin(['ok', 'no_rating'])].itertuples(index=False):
+        freshness.record(row.UAID, row.Scraped_At, row.Updated if isinstance(row.Updated, str) else None)
+    freshness.save()
+    print(f"\nAppended {len(records)} ratings to {ratings_csv}")
+    if records and main_store:
+        update_trends()
+
+    if not keep:
+        archive = os.path.join(shard_dir, "merged", datetime.now().strftime("%Y%m%dT%H%M%S"))
+        os.makedirs(archive, exist_ok=True)
+        for index, count in shards:
+            for kind, path in shard_paths(index, count, shard_dir).items():
+                if kind != 'journal' and os.path.exists(path):
+                    shutil.move(path, os.path.join(archive, os.path.basename(path)))
+        print(f"Shard outputs moved to {archive}")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge sharded WTN scrape outputs into the ratings store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge = subparsers.add_parser("merge", help="Merge data/shards/ into the main ratings store")
+    merge.add_argument("--shard-dir", default=SHARD_DIR, help=f"Directory with shard outputs (default: {SHARD_DIR})")
+    merge.add_argument("--dry-run", action="store_true", help="Report coverage and conflicts without writing")
+    merge.add_argument("--keep", action="store_true", help="Leave the shard files in place after merging")
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        merge_shards(args.shard_dir, dry_run=args.dry_run, keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
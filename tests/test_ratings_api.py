@@ -0,0 +1,98 @@
+import gzip
+import http.client
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratings_api import RatingsAPI, encode_cursor, start_server
+from ratings_cache import RatingsCache
+
+
+@pytest.fixture
+def api_url(tmp_path, monkeypatch):
+    # Relative default store paths (the SQLite repository) resolve inside tmp_path
+    monkeypatch.chdir(tmp_path)
+    dates = pd.date_range("2026-01-07", periods=6, freq="7D").strftime("%Y-%m-%d")
+    ratings = [(f"Player {uaid}", uaid, date, fmt, 10 + uaid + week / 10, "High")
+               for uaid in range(1, 21) for week, date in enumerate(dates) for fmt in ("Doubles", "Singles")]
+    pd.DataFrame(ratings, columns=['Name', 'UAID', 'Date', 'Format', 'Rating', 'Confidence']).to_csv(
+        "ratings.csv", index=False)
+    pd.DataFrame({
+        'Name': [f"Player {uaid}" for uaid in range(1, 21)],
+        'UAID': range(1, 21),
+        'NTRP_2026': ["3.5C" if uaid % 2 else "4.0C" for uaid in range(1, 21)],
+        'WTN_Profile': [f"https://example.com/{uaid}" for uaid in range(1, 21)],
+    }).to_csv("profiles.csv", index=False)
+    cache = RatingsCache(csv_path="ratings.csv", parquet_dir="missing", db_path="missing.sqlite")
+    server, url = start_server(RatingsAPI(cache, profiles_csv="profiles.csv"))
+    yield url.removeprefix("http://")
+    server.shutdown()
+
+
+def get(host, path, headers=None):
+    conn = http.client.HTTPConnection(host)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_etag_revalidation_returns_304(api_url):
+    response, body = get(api_url, "/snapshot")
+    assert response.status == 200
+    etag = response.getheader("ETag")
+    response, body = get(api_url, "/snapshot", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+    response, _ = get(api_url, "/snapshot?format=Singles", {"If-None-Match": etag})
+    assert response.status == 200
+
+
+def test_gzip_body_matches_plain(api_url):
+    _, plain = get(api_url, "/snapshot")
+    response, body = get(api_url, "/snapshot", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert json.loads(gzip.decompress(body)) == json.loads(plain)
+
+
+def test_cursor_pages_cover_every_row_once(api_url):
+    _, body = get(api_url, "/leaderboard?limit=1000")
+    everything = json.loads(body)['data']
+    rows, path = [], "/leaderboard?limit=7"
+    while True:
+        _, body = get(api_url, path)
+        result = json.loads(body)
+        rows += result['data']
+        if result['next_cursor'] is None:
+            break
+        path = f"/leaderboard?limit=7&cursor={result['next_cursor']}"
+    assert rows == everything
+    assert len(rows) == 40
+
+
+@pytest.mark.parametrize("path", [
+    "/snapshot?limit=abc",
+    "/snapshot?limit=0",
+    "/snapshot?format=Mixed",
+    "/snapshot?cursor=not-a-cursor!",
+    "/snapshot?cursor=" + encode_cursor([1]),
+    "/leaderboard?cursor=" + encode_cursor(["fast", 1, "Singles"]),
+    "/roster?cursor=" + encode_cursor([3, "Player 3"]),
+])
+def test_bad_parameters_are_json_400s(api_url, path):
+    response, body = get(api_url, path)
+    assert response.status == 400
+    assert 'error' in json.loads(body)
+
+
+def test_repeated_format_in_history_is_not_duplicated(api_url):
+    _, once = get(api_url, "/players/3/history?format=Singles")
+    _, twice = get(api_url, "/players/3/history?format=Singles&format=Singles")
+    assert json.loads(twice)['data'] == json.loads(once)['data']
+    assert len(json.loads(once)['data']) == 6
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ratings_schema
+from ratings_store import build_snapshot, update_snapshot
+
+
+def ratings(rows):
+    df = pd.DataFrame(rows, columns=['UAID', 'Name', 'Date', 'Format', 'Rating', 'Confidence'])
+    return ratings_schema.compact(ratings_schema.validate_ratings(df)[0])
+
+
+def ordered(snapshot):
+    snapshot = snapshot.assign(Name=snapshot['Name'].astype(object))
+    return snapshot.sort_values(['UAID', 'Format']).reset_index(drop=True)
+
+
+def assert_matches_full_build(old, new):
+    expected = build_snapshot(ratings_schema.concat([old, new]).drop_duplicates(
+        ['UAID', 'Format', 'Date'], keep='last'))
+    pd.testing.assert_frame_equal(ordered(update_snapshot(build_snapshot(old), new)), ordered(expected),
+                                  check_categorical=False)
+
+
+def test_batch_with_several_new_dates_uses_its_own_previous():
+    old = ratings([(1, "A", "2026-01-07", "Singles", 20.0, "High"),
+                   (1, "A", "2026-01-14", "Singles", 21.0, "High")])
+    new = ratings([(1, "A", "2026-01-21", "Singles", 22.0, "High"),
+                   (1, "A", "2026-01-28", "Singles", 23.0, "High")])
+    row = update_snapshot(build_snapshot(old), new).iloc[0]
+    assert row['Prev_Date'] == pd.Timestamp("2026-01-21")
+    assert row['Prev_Rating'] == 22.0
+    assert_matches_full_build(old, new)
+
+
+def test_late_rating_between_previous_and_latest_becomes_previous():
+    old = ratings([(1, "A", "2026-01-07", "Singles", 20.0, "High"),
+                   (1, "A", "2026-01-21", "Singles", 22.0, "High")])
+    new = ratings([(1, "A", "2026-01-14", "Singles", 21.0, "High")])
+    row = update_snapshot(build_snapshot(old), new).iloc[0]
+    assert row['Date'] == pd.Timestamp("2026-01-21")
+    assert row['Prev_Date'] == pd.Timestamp("2026-01-14")
+    assert_matches_full_build(old, new)
+
+
+def test_random_batches_match_full_build():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2026-01-01", periods=12, freq="7D").strftime("%Y-%m-%d")
+    rows = [(uaid, f"P{uaid}", date, fmt, round(float(rng.uniform(1, 40)), 2), "High")
+            for uaid in range(1, 30) for fmt in ratings_schema.FORMATS for date in dates
+            if rng.random() < 0.6]
+    for _ in range(20):
+        split = rng.random(len(rows)) < 0.7
+        old = ratings([row for row, s in zip(rows, split) if s])
+        # Some batch rows correct a stored date with a new rating
+        new = ratings([row[:4] + (round(float(rng.uniform(1, 40)), 2), row[5])
+                       for row, s in zip(rows, split) if not s or rng.random() < 0.05])
+        assert_matches_full_build(old, new)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Lightweight HTTP backend for fetching WTN ratings without a browser.
+Fetches the data the USTA WTN widget is built from over a pooled keep-alive
+requests.Session and parses it into the same result dict as scrape_wtn_profile.
+"""
+
+import json
+from datetime import datetime
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrape_metrics import ProfileTrace
+
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# JSON keys (lower-cased) that may carry each field of a WTN entry
+FORMAT_KEYS = ('type', 'gametype', 'format', 'title')
+RATING_KEYS = ('rating', 'ratingvalue', 'wtn', 'value')
+CONFIDENCE_KEYS = ('confidence', 'confidencelevel', 'ratingconfidence')
+UPDATED_KEYS = ('updated', 'updateddate', 'lastupdated', 'ratingdate')
+
+# Responses urllib3 retries on its own before the scraper sees them
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def empty_result():
+    """Result dict for a profile where no WTN data could be found."""
+    return {
+        'doubles_rating': None,
+        'doubles_confidence': None,
+        'singles_rating': None,
+        'singles_confidence': None,
+        'updated_date': None
+    }
+
+
+def has_rating(result):
+    """True if a result dict holds at least one rating."""
+    return bool(result['doubles_rating'] or result['singles_rating'])
+
+
+def normalize_confidence(text):
+    """Reduce "High Confidence" (or "HIGH") to "High"."""
+    if text is None:
+        return None
+    text = str(text).strip()
+    return text.split()[0].capitalize() if text else None
+
+
+def normalize_updated(text):
+    """Return an updated date as MM/DD/YYYY, the format shown on the widget."""
+    if text is None:
+        return None
+    text = str(text).replace("Updated", "").strip()
+    if not text:
+        return None
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S.%fZ"):
+        try:
+            return datetime.strptime(text, fmt).strftime("%m/%d/%Y")
+        except ValueError:
+            continue
+    return text
+
+
+def parse_wtn_html(html):
+    """
+    Parse WTN ratings from the widget markup.
+
+    Looks for the same v-form-wtn-widget__section* elements the Selenium
+    scraper reads, so a saved page and a live page give identical results.
+
+    Args:
+        html: HTML text containing the WTN widget
+
+    Returns:
+        dict: Same shape as scrape_wtn_profile's result
+    """
+    result = empty_result()
+    soup = BeautifulSoup(html, "html.parser")
+
+    for section in soup.find_all(class_="v-form-wtn-widget__section"):
+        title_elem = section.find(class_="v-form-wtn-widget__section-title")
+        if title_elem is None:
+            continue
+        title = title_elem.get_text(strip=True).upper()
+
+        rating_elem = section.find(class_="v-form-wtn-widget__section-value")
+        rating = rating_elem.get_text(strip=True) if rating_elem else None
+
+        conf_elem = section.find(class_="v-form-wtn-widget__section-confidence")
+        confidence = normalize_confidence(conf_elem.get_text(strip=True)) if conf_elem else None
+
+        # Get the updated date (distinct from "Last Played")
+        for subtitle_elem in section.find_all(class_="v-form-wtn-widget__section-subtitle"):
+            subtitle_text = subtitle_elem.get_text(strip=True)
+            if "Updated" in subtitle_text:
+                if not result['updated_date']:
+                    result['updated_date'] = normalize_updated(subtitle_text)
+                break
+
+        if "DOUBLES" in title:
+            result['doubles_rating'] = rating or None
+            result['doubles_confidence'] = confidence
+        elif "SINGLES" in title:
+            result['singles_rating'] = rating or None
+            result['singles_confidence'] = confidence
+
+    return result
+
+
+def _pick(entry, keys):
+    """Return the first value in a dict whose lower-cased key is in keys."""
+    for key, value in entry.items():
+        if key.lower() in keys and value not in (None, ""):
+            return value
+    return None
+
+
+def _iter_dicts(payload):
+    """Walk a JSON payload and yield every nested dict."""
+    if isinstance(payload, dict):
+        yield payload
+        for value in payload.values():
+            yield from _iter_dicts(value)
+    elif isinstance(payload, list):
+        for value in payload:
+            yield from _iter_dicts(value)
+
+
+def parse_wtn_json(payload):
+    """
+    Parse WTN ratings from the JSON payload the widget is built from.
+
+    Any nested object that names a singles/doubles format and carries a rating
+    is treated as a WTN entry.
+
+    Args:
+        payload: Decoded JSON (dict or list)
+
+    Returns:
+        dict: Same shape as scrape_wtn_profile's result
+    """
+    result = empty_result()
+
+    for entry in _iter_dicts(payload):
+        format_name = _pick(entry, FORMAT_KEYS)
+        rating = _pick(entry, RATING_KEYS)
+        if not isinstance(format_name, str) or rating is None or isinstance(rating, (dict, list)):
+            continue
+        format_name = format_name.upper()
+        if "DOUBLES" in format_name:
+            prefix = 'doubles'
+        elif "SINGLES" in format_name:
+            prefix = 'singles'
+        else:
+            continue
+        if result[f'{prefix}_rating']:
+            continue
+
+        result[f'{prefix}_rating'] = str(rating).strip()
+        result[f'{prefix}_confidence'] = normalize_confidence(_pick(entry, CONFIDENCE_KEYS))
+        if not result['updated_date']:
+            result['updated_date'] = normalize_updated(_pick(entry, UPDATED_KEYS))
+
+    return result
+
+
+def parse_wtn_response(text, content_type=""):
+    """Parse a fetched response body as JSON or widget HTML, whichever it is."""
+    stripped = text.lstrip()
+    if "json" in content_type or stripped.startswith(("{", "[")):
+        try:
+            return parse_wtn_json(json.loads(text))
+        except ValueError:
+            pass
+    return parse_wtn_html(text)
+
+
+class HttpFetcher:
+    """
+    Fetch WTN data for UAIDs over a pooled keep-alive requests.Session.
+
+    One fetcher is shared by all workers; the connection pool is sized to the
+    number of workers so connections are reused instead of re-opened.
+
+    url_template is where to fetch the widget data for a UAID ({uaid} is substituted).
+    The response may be either the rendered widget HTML or the JSON payload the
+    widget is built from; the profile page itself is only an empty app shell.
+    """
+
+    def __init__(self, url_template, pool_size=1, timeout=15, retries=2):
+        self.url_template = url_template
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'application/json, text/html;q=0.9',
+        })
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=RETRY_STATUSES)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1), max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, uaid, trace=None):
+        """
+        Fetch the raw widget data for a UAID.
+
+        Args:
+            trace: Optional ProfileTrace; retries urllib3 made are counted as http_retries
+
+        Returns:
+            tuple: (response text, content type)
+        """
+        try:
+            response = self.session.get(self.url_template.format(uaid=uaid), timeout=self.timeout)
+        except requests.exceptions.RetryError:
+            if trace is not None:
+                trace.count('http_retries', self.retries)
+            raise
+        retried = len(getattr(response.raw.retries, 'history', None) or ())
+        if trace is not None and retried:
+            trace.count('http_retries', retried)
+        response.raise_for_status()
+        return response.text, response.headers.get('Content-Type', '')
+
+    def scrape(self, uaid, name, trace=None):
+        """
+        Fetch and parse WTN ratings for a player.
+
+        Args:
+            uaid: Player UAID
+            name: Player name (for logging)
+            trace: Optional ProfileTrace to record phase timings and counters in
+
+        Returns:
+            dict: Same shape as scrape_wtn_profile's result
+        """
+        trace = trace if trace is not None else ProfileTrace(uaid, name)
+        try:
+            print(f"Fetching WTN data for {name}...")
+            with trace.span('navigation'):
+                text, content_type = self.fetch(uaid, trace)
+            with trace.span('parse'):
+                result = parse_wtn_response(text, content_type)
+            result['raw_page'] = text
+            result['content_type'] = content_type
+            return result
+        except requests.Timeout as e:
+            print(f"  Timeout fetching WTN data for {name}: {e}")
+            trace.count('timeouts')
+            return empty_result()
+        except (requests.exceptions.RetryError, requests.ConnectionError) as e:
+            print(f"  Server unavailable fetching WTN data for {name}: {e}")
+            trace.count('server_errors')
+            return empty_result()
+        except requests.HTTPError as e:
+            print(f"  HTTP error fetching WTN data for {name}: {e}")
+            # 429 and 5xx may clear up on a retry; other statuses (e.g. 404) won't
+            trace.count('server_errors' if e.response.status_code in RETRY_STATUSES else 'errors')
+            return empty_result()
+        except Exception as e:
+            print(f"  Error fetching WTN data for {name}: {e}")
+            trace.count('errors')
+            return empty_result()
+
+    def close(self):
+        self.session.close()